@@ -0,0 +1,153 @@
+# backend/answer_cache.py
+
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# === Cache Parameters ===
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def normalize_question(question):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+def cache_key(question, chunk_ids, corpus_version=""):
+    """Key an answer on what was asked and which chunks it was grounded on."""
+    ids = ",".join(str(i) for i in chunk_ids)
+    raw = f"{corpus_version}|{ids}|{normalize_question(question)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# === In-memory tier ===
+class MemoryCache:
+    """Thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        with self._lock:
+            self._items[key] = (expires_at or time.time() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+# === SQLite tier (survives restarts, shared between workers) ===
+class SqliteCache:
+    """Disk-backed LRU+TTL table; WAL mode lets several worker processes share one file."""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES * 10, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM answers WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        return row
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now):
+        self._conn.execute("DELETE FROM answers WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM answers WHERE key NOT IN "
+            "(SELECT key FROM answers ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+
+# === Two-tier answer cache ===
+class AnswerCache:
+    """
+    LRU+TTL cache for generated answers, with an optional SQLite tier.
+
+    Lookups hit the in-process LRU first, then the shared disk table.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, path=None):
+        self.memory = MemoryCache(max_entries=max_entries, ttl=ttl)
+        self.disk = SqliteCache(path, ttl=ttl) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()   # guards the counters; each tier locks itself
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            row = self.disk.get(key)
+            if row:
+                value = row[0]
+                self.memory.set(key, value, expires_at=row[1])
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.memory),
+            "backend": "memory+sqlite" if self.disk is not None else "memory",
+        }
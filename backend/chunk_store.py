@@ -0,0 +1,320 @@
+# backend/chunk_store.py
+
+import os
+import json
+import mmap
+import shutil
+import hashlib
+from array import array
+
+import numpy as np
+
+# === Paths ===
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK_STORE_DIR = os.path.join(PROJECT_ROOT, "data", "chunkstore")
+CHUNKS_JSON = os.path.join(PROJECT_ROOT, "data", "chunks.json")     # legacy single array
+CHUNKS_JSONL = os.path.join(PROJECT_ROOT, "data", "chunks.jsonl")   # one chunk per line
+
+# === On-disk layout (one directory) ===
+#   text.bin        all chunk texts, UTF-8, back to back
+#   offsets.npy     int64[n + 1] byte offsets into text.bin (length = next - this)
+#   source_ids.npy  int32[n] index into sources.json
+#   type_ids.npy    int32[n] index into types.json
+#   sources.json    distinct source strings
+#   types.json      distinct type strings
+#   prev_ids.npy    int32[n] chunk holding the previous window of the same document, or -1
+#   source_list_offsets.npy  int64[n + 1] offsets into source_lists.npy
+#   source_lists.npy         int32[] every source of each chunk (primary first), as sources.json indices
+#   meta.json       {"content_hash": ...} computed while writing
+# The last four are absent from older stores.
+TEXT_FILE = "text.bin"
+OFFSETS_FILE = "offsets.npy"
+SOURCE_IDS_FILE = "source_ids.npy"
+TYPE_IDS_FILE = "type_ids.npy"
+SOURCES_FILE = "sources.json"
+TYPES_FILE = "types.json"
+PREV_IDS_FILE = "prev_ids.npy"
+SOURCE_LIST_OFFSETS_FILE = "source_list_offsets.npy"
+SOURCE_LISTS_FILE = "source_lists.npy"
+META_FILE = "meta.json"
+
+
+def _chunk_text(chunk):
+    return chunk.get("text") or chunk.get("chunk") or ""
+
+def _content_hash(offsets, text_sha1):
+    """SHA-1 of the chunk boundaries and of the SHA-1 of the texts blob."""
+    h = hashlib.sha1(np.ascontiguousarray(offsets, dtype=np.int64).tobytes())
+    h.update(text_sha1.digest())
+    return h.hexdigest()
+
+
+# === Writer ===
+class ChunkStoreWriter:
+    """
+    Append chunks one at a time; only offsets and column codes stay in memory.
+
+    The store is built in a sibling temp directory and swapped in on close,
+    so a running server that has the old files mmap'd keeps reading them
+    intact (the old inodes live until it reopens).
+    """
+
+    def __init__(self, store_dir=CHUNK_STORE_DIR):
+        self.store_dir = store_dir
+        self._build_dir = f"{store_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(self._build_dir, ignore_errors=True)
+        os.makedirs(self._build_dir)
+        self._text = open(os.path.join(self._build_dir, TEXT_FILE), "wb")
+        self._text_sha1 = hashlib.sha1()
+        self._offsets = array("q", [0])
+        self._source_ids = array("i")
+        self._type_ids = array("i")
+        self._prev_ids = array("i")
+        self._extra_sources = {}   # chunk index -> source ids merged into it besides its own
+        self._sources = {}
+        self._types = {}
+
+    def add(self, text, source="unknown", type_="web", prev=-1):
+        """Append a chunk and return its index; ``prev`` is the chunk holding the previous window."""
+        data = text.encode("utf-8")
+        self._text.write(data)
+        self._text_sha1.update(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._source_ids.append(self._sources.setdefault(source, len(self._sources)))
+        self._type_ids.append(self._types.setdefault(type_, len(self._types)))
+        self._prev_ids.append(prev)
+        return len(self._prev_ids) - 1
+
+    def add_source(self, i, source):
+        """Attach another source to chunk ``i`` (a near-duplicate of it was found there)."""
+        sid = self._sources.setdefault(source, len(self._sources))
+        extra = self._extra_sources.setdefault(i, [])
+        if sid != self._source_ids[i] and sid not in extra:
+            extra.append(sid)
+
+    def close(self):
+        self._text.close()
+        build = self._build_dir
+        np.save(os.path.join(build, OFFSETS_FILE), np.frombuffer(self._offsets, dtype=np.int64))
+        np.save(os.path.join(build, SOURCE_IDS_FILE), np.frombuffer(self._source_ids, dtype=np.int32))
+        np.save(os.path.join(build, TYPE_IDS_FILE), np.frombuffer(self._type_ids, dtype=np.int32))
+        np.save(os.path.join(build, PREV_IDS_FILE), np.frombuffer(self._prev_ids, dtype=np.int32))
+        list_offsets, lists = array("q", [0]), array("i")
+        for i, sid in enumerate(self._source_ids):
+            lists.append(sid)
+            lists.extend(self._extra_sources.get(i, ()))
+            list_offsets.append(len(lists))
+        np.save(os.path.join(build, SOURCE_LIST_OFFSETS_FILE), np.frombuffer(list_offsets, dtype=np.int64))
+        np.save(os.path.join(build, SOURCE_LISTS_FILE), np.frombuffer(lists, dtype=np.int32))
+        with open(os.path.join(build, SOURCES_FILE), "w", encoding="utf-8") as f:
+            json.dump(list(self._sources), f, ensure_ascii=False)
+        with open(os.path.join(build, TYPES_FILE), "w", encoding="utf-8") as f:
+            json.dump(list(self._types), f, ensure_ascii=False)
+        with open(os.path.join(build, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"content_hash": _content_hash(self._offsets, self._text_sha1)}, f)
+        self._swap()
+
+    def abort(self):
+        """Drop the half-built store; the current one stays in place."""
+        self._text.close()
+        shutil.rmtree(self._build_dir, ignore_errors=True)
+
+    def _swap(self):
+        # os.replace won't overwrite a non-empty directory: move the old store aside first
+        old = f"{self.store_dir}.old-{os.getpid()}"
+        if os.path.exists(self.store_dir):
+            os.replace(self.store_dir, old)
+        os.replace(self._build_dir, self.store_dir)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_chunk_store(chunks, store_dir=CHUNK_STORE_DIR):
+    """Write an iterable of chunk dicts ({"chunk", "source", "type"}) to ``store_dir``."""
+    with ChunkStoreWriter(store_dir) as writer:
+        for chunk in chunks:
+            writer.add(_chunk_text(chunk), chunk.get("source", "unknown"), chunk.get("type", "web"))
+
+
+# === Reader ===
+class ChunkStore:
+    """
+    Read-only view over a chunk store.
+
+    Texts are decoded from the mmap'd blob on access, so opening the store
+    costs a few page faults regardless of corpus size.
+    """
+
+    def __init__(self, buf, offsets, source_ids, type_ids, sources, types, version="",
+                 prev_ids=None, source_list_offsets=None, source_lists=None, content_hash=None):
+        self._buf = buf
+        self._offsets = offsets
+        self._source_ids = source_ids
+        self._type_ids = type_ids
+        self._prev_ids = prev_ids
+        self._source_list_offsets = source_list_offsets
+        self._source_lists = source_lists
+        self.sources = sources
+        self.types = types
+        self.version = version   # changes whenever the corpus is rebuilt
+        self._content_hash = content_hash
+
+    @classmethod
+    def open(cls, store_dir=CHUNK_STORE_DIR):
+        with open(os.path.join(store_dir, TEXT_FILE), "rb") as f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        with open(os.path.join(store_dir, SOURCES_FILE), "r", encoding="utf-8") as f:
+            sources = json.load(f)
+        with open(os.path.join(store_dir, TYPES_FILE), "r", encoding="utf-8") as f:
+            types = json.load(f)
+
+        def optional(name):
+            path = os.path.join(store_dir, name)
+            return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+        meta = {}
+        if os.path.exists(os.path.join(store_dir, META_FILE)):
+            with open(os.path.join(store_dir, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+        return cls(
+            buf,
+            np.load(os.path.join(store_dir, OFFSETS_FILE), mmap_mode="r"),
+            np.load(os.path.join(store_dir, SOURCE_IDS_FILE), mmap_mode="r"),
+            np.load(os.path.join(store_dir, TYPE_IDS_FILE), mmap_mode="r"),
+            sources,
+            types,
+            version=f"{size}-{stat.st_mtime_ns}",
+            prev_ids=optional(PREV_IDS_FILE),
+            source_list_offsets=optional(SOURCE_LIST_OFFSETS_FILE),
+            source_lists=optional(SOURCE_LISTS_FILE),
+            content_hash=meta.get("content_hash"),
+        )
+
+    @classmethod
+    def from_records(cls, chunks):
+        """Build an in-memory store from chunk dicts (chunks.jsonl / legacy chunks.json)."""
+        blob, offsets, source_ids, type_ids = bytearray(), [0], [], []
+        prev_ids, list_offsets, lists = [], [0], []
+        sources, types, index_of = {}, {}, {}
+        for i, chunk in enumerate(chunks):
+            blob += _chunk_text(chunk).encode("utf-8")
+            offsets.append(len(blob))
+            source = chunk.get("source", "unknown")
+            source_ids.append(sources.setdefault(source, len(sources)))
+            type_ids.append(types.setdefault(chunk.get("type", "web"), len(types)))
+            if "id" in chunk:
+                index_of[chunk["id"]] = i
+            if "prev" in chunk:
+                prev_ids.append(index_of.get(chunk["prev"], -1))
+            else:   # written before chunks could be dropped: same-source neighbours are adjacent windows
+                prev_ids.append(i - 1 if i and source_ids[i - 1] == source_ids[i] else -1)
+            for s in dict.fromkeys([source, *chunk.get("sources", ())]):
+                lists.append(sources.setdefault(s, len(sources)))
+            list_offsets.append(len(lists))
+        return cls(
+            bytes(blob),
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(source_ids, dtype=np.int32),
+            np.asarray(type_ids, dtype=np.int32),
+            list(sources),
+            list(types),
+            version=hashlib.sha1(blob).hexdigest()[:16],
+            prev_ids=np.asarray(prev_ids, dtype=np.int32),
+            source_list_offsets=np.asarray(list_offsets, dtype=np.int64),
+            source_lists=np.asarray(lists, dtype=np.int32),
+        )
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def text(self, i):
+        return self._buf[int(self._offsets[i]):int(self._offsets[i + 1])].decode("utf-8")
+
+    def source(self, i):
+        return self.sources[self._source_ids[i]]
+
+    def type(self, i):
+        return self.types[self._type_ids[i]]
+
+    def all_sources(self, i):
+        """Every source chunk ``i`` was found at (near-duplicates merged), primary first."""
+        if self._source_lists is None:
+            return [self.source(i)]
+        lo, hi = int(self._source_list_offsets[i]), int(self._source_list_offsets[i + 1])
+        return [self.sources[sid] for sid in self._source_lists[lo:hi]]
+
+    def prev(self, i):
+        """Chunk holding the window just before chunk ``i`` in its document, or -1."""
+        if self._prev_ids is not None:
+            return int(self._prev_ids[i])
+        # Older stores: chunks were never dropped, so neighbours of one source are adjacent windows
+        return i - 1 if i > 0 and self._source_ids[i - 1] == self._source_ids[i] else -1
+
+    def get(self, i):
+        """Chunk ``i`` as a dict in the chunks.jsonl shape."""
+        return {"chunk": self.text(i), "source": self.source(i), "sources": self.all_sources(i), "type": self.type(i)}
+
+    def texts(self):
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def content_hash(self):
+        """
+        Hash of the texts and their boundaries; unlike ``version``, equal for
+        an identical rebuild. Stores record it when written, so only older
+        stores and in-memory ones read the whole blob here (once).
+        """
+        if self._content_hash is None:
+            text_sha1 = hashlib.sha1()
+            step = 1 << 24
+            for start in range(0, len(self._buf), step):
+                text_sha1.update(self._buf[start:start + step])
+            self._content_hash = _content_hash(self._offsets, text_sha1)
+        return self._content_hash
+
+
+def iter_chunk_records(path):
+    """Chunk dicts from chunks.jsonl, read line by line, or from a legacy chunks.json array."""
+    with open(path, "r", encoding="utf-8") as f:
+        if not path.endswith(".jsonl"):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def find_chunk_records(jsonl_path=CHUNKS_JSONL, json_path=CHUNKS_JSON):
+    """Path of the chunk records prepare_chunks.py produced, newest format first; None if neither exists."""
+    for path in (jsonl_path, json_path):
+        if path and os.path.exists(path):
+            return path
+    return None
+
+def open_chunk_store(store_dir=CHUNK_STORE_DIR, json_path=CHUNKS_JSON, jsonl_path=CHUNKS_JSONL):
+    """Open the binary store, falling back to parsing chunks.jsonl / chunks.json if it was never built."""
+    if os.path.exists(os.path.join(store_dir, OFFSETS_FILE)):
+        return ChunkStore.open(store_dir)
+    path = find_chunk_records(jsonl_path, json_path)
+    if path is None:
+        print(f"❌ No chunk store at {store_dir} and no chunk records at {jsonl_path}")
+        return ChunkStore.from_records([])
+    return ChunkStore.from_records(iter_chunk_records(path))
+
+
+if __name__ == "__main__":
+    # Convert existing chunk records without re-running prepare_chunks.py
+    path = find_chunk_records()
+    if path is None:
+        raise SystemExit(f"❌ No chunk records at {CHUNKS_JSONL} or {CHUNKS_JSON}")
+    write_chunk_store(iter_chunk_records(path))
+    print(f"✅ Chunk store written to {CHUNK_STORE_DIR} from {path}")
@@ -0,0 +1,81 @@
+# backend/context_builder.py
+
+# === Context Parameters ===
+# Mirrors utils/prepare_chunks.OVERLAP: consecutive chunks of one document share this many words.
+CHUNK_OVERLAP = 50
+DEFAULT_TOKEN_BUDGET = 1500
+MIN_TAIL_TOKENS = 40   # don't bother packing a truncated segment smaller than this
+MAX_HEADER_SOURCES = 3 # near-duplicate chunks can carry many URLs; list the first few
+
+
+def estimate_tokens(text):
+    """Rough Gemini token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+def overlap_length(prev_words, next_words, expected=CHUNK_OVERLAP):
+    """Number of leading words of ``next_words`` that repeat the tail of ``prev_words``."""
+    limit = min(len(prev_words), len(next_words))
+    if expected <= limit and prev_words[-expected:] == next_words[:expected]:
+        return expected
+    # Short tail chunks (or a different OVERLAP) fall back to a scan
+    for n in range(limit, 0, -1):
+        if prev_words[-n:] == next_words[:n]:
+            return n
+    return 0
+
+
+def _segments(hits, store):
+    """
+    Merge hits that are consecutive windows of one document, best rank first.
+    Only a chunk whose recorded predecessor is the previous hit is merged, so
+    a window dropped as a near-duplicate never lets unrelated words be
+    trimmed as overlap.
+    """
+    rank = {doc_id: r for r, (doc_id, _score) in enumerate(hits)}
+    segments = []
+    for doc_id in sorted(rank):
+        last = segments[-1] if segments else None
+        if last and store.prev(doc_id) == last["ids"][-1]:
+            words = store.text(doc_id).split()
+            last["words"].extend(words[overlap_length(last["words"], words):])
+            last["ids"].append(doc_id)
+            last["rank"] = min(last["rank"], rank[doc_id])
+        else:
+            segments.append({
+                "ids": [doc_id],
+                "sources": store.all_sources(doc_id),
+                "words": store.text(doc_id).split(),
+                "rank": rank[doc_id],
+            })
+    return sorted(segments, key=lambda seg: seg["rank"])
+
+def _source_header(sources):
+    shown = ", ".join(sources[:MAX_HEADER_SOURCES])
+    more = len(sources) - MAX_HEADER_SOURCES
+    return f"[Source: {shown}{f' (+{more} more)' if more > 0 else ''}]\n"
+
+def build_context(hits, store, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Pack the retrieved chunks into a prompt context of at most ``token_budget`` tokens.
+
+    Returns ``(context, chunk_ids)`` where ``chunk_ids`` are the chunks that
+    made it into the context, in packing order.
+    """
+    blocks, used_ids, remaining = [], [], token_budget
+    for seg in _segments(hits, store):
+        header = _source_header(seg["sources"])
+        body = " ".join(seg["words"])
+        cost = estimate_tokens(header + body)
+        if cost > remaining:
+            # Truncate the segment to what is left, keeping whole words
+            room = remaining - estimate_tokens(header)
+            if room < MIN_TAIL_TOKENS:
+                break
+            body = body[:room * 4].rsplit(" ", 1)[0]
+            cost = remaining
+        blocks.append(header + body)
+        used_ids.extend(seg["ids"])
+        remaining -= cost
+        if remaining <= 0:
+            break
+    return "\n\n".join(blocks), used_ids
@@ -1,47 +1,76 @@
 # backend/kg_interface.py
 
 import os
-import json
-import spacy
-import re
+import queue
+import argparse
+import threading
 from neo4j import GraphDatabase
 from pathlib import Path
-from dotenv import load_dotenv
 from utils.secrets_loader import get_secret
-
-# === Load spaCy NLP Model ===
-nlp = spacy.load("en_core_web_sm")
+from chunk_store import open_chunk_store, find_chunk_records, CHUNK_STORE_DIR
+from nlp_registry import get_nlp
+from kg_writer import KGBulkWriter, DEFAULT_BATCH_SIZE
+from kg_ledger import IngestionLedger, chunk_hash
+from kg_query import ensure_schema, search_entities, format_relations
+from kg_snapshot import load_snapshot
+from kg_traversal import KGTraverser, neo4j_fetcher, snapshot_fetcher
 
 # === Neo4j AuraDB Credentials ===
 NEO4J_URI = get_secret("NEO4J_URI")
 NEO4J_USER = get_secret("NEO4J_USERNAME")
 NEO4J_PASS = get_secret("NEO4J_PASSWORD")
 NEO4J_DB   = get_secret("NEO4J_DATABASE", default="neo4j")
-print("🔐 Neo4j URI:", NEO4J_URI)
-print("👤 User:", NEO4J_USER)
-print("📦 Database:", NEO4J_DB)
-
-
-if not NEO4J_PASS:
-    raise ValueError("❌ NEO4J_PASSWORD not found in secrets.toml or .env")
+KG_BATCH_SIZE = int(get_secret("KG_BATCH_SIZE", default=DEFAULT_BATCH_SIZE))
+KG_NLP_PROCESSES = int(get_secret("KG_NLP_PROCESSES", default=1))
+KG_NLP_BATCH = int(get_secret("KG_NLP_BATCH", default=64))
+KG_WRITERS = int(get_secret("KG_WRITERS", default=1))
+KG_SEED_ENTITIES = int(get_secret("KG_SEED_ENTITIES", default=3))
+KG_MAX_DEPTH = int(get_secret("KG_MAX_DEPTH", default=2))
+KG_FANOUT = int(get_secret("KG_FANOUT", default=5))
+KG_MAX_VISITED = int(get_secret("KG_MAX_VISITED", default=25))
+KG_TRAVERSAL_CACHE = int(get_secret("KG_TRAVERSAL_CACHE", default=1024))
+# "neo4j" queries AuraDB; "snapshot" serves from data/kg_snapshot.npz with no connection
+KG_BACKEND = get_secret("KG_BACKEND", default="neo4j").lower()
 
 # === Load chunked data ===
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-CHUNK_FILE = os.path.join(PROJECT_ROOT, "data", "chunks.json")
-
-# === Connect to Neo4j Aura ===
-driver = GraphDatabase.driver(
-    NEO4J_URI,
-    auth=(NEO4J_USER, NEO4J_PASS),
-    connection_timeout=30
-)
-
-try:
-    driver.verify_connectivity()
-    print("✅ Connected to Neo4j AuraDB")
-except Exception as e:
-    print(f"❌ Connection failed: {e}")
-    exit(1)
+CHUNK_FILE = os.path.join(PROJECT_ROOT, "data", "chunks.jsonl")
+
+driver = None
+snapshot = None
+
+if KG_BACKEND == "snapshot":
+    snapshot = load_snapshot()
+else:
+    print("🔐 Neo4j URI:", NEO4J_URI)
+    print("👤 User:", NEO4J_USER)
+    print("📦 Database:", NEO4J_DB)
+
+    if not NEO4J_PASS:
+        raise ValueError("❌ NEO4J_PASSWORD not found in secrets.toml or .env")
+
+    # === Connect to Neo4j Aura ===
+    driver = GraphDatabase.driver(
+        NEO4J_URI,
+        auth=(NEO4J_USER, NEO4J_PASS),
+        connection_timeout=30
+    )
+
+    try:
+        driver.verify_connectivity()
+        print("✅ Connected to Neo4j AuraDB")
+    except Exception as e:
+        print(f"❌ Connection failed: {e}")
+        exit(1)
+
+# === Multi-hop traversal, neighborhoods cached per entity until the next KG build ===
+traverser = None
+if snapshot is not None:
+    traverser = KGTraverser(snapshot_fetcher(snapshot), lambda: snapshot.version, KG_MAX_DEPTH,
+                            KG_FANOUT, KG_MAX_VISITED, KG_TRAVERSAL_CACHE)
+elif driver is not None:
+    traverser = KGTraverser(neo4j_fetcher(driver), IngestionLedger().build_version, KG_MAX_DEPTH,
+                            KG_FANOUT, KG_MAX_VISITED, KG_TRAVERSAL_CACHE)
 #== Neo4j Query == 
 # def query_neo4j(question):
 #     """
@@ -75,37 +104,31 @@ except Exception as e:
 #             return "No relationships found for the entity/entities."
 
 def query_neo4j(question: str) -> str:
-    from neo4j import GraphDatabase
-    keywords = [word for word in question.split() if len(word) > 3]  # basic filter
-
-    with driver.session() as session:
-        for kw in keywords:
-            result = session.run(
-                "MATCH (a:Entity)-[r]->(b:Entity) "
-                "WHERE toLower(a.name) CONTAINS toLower($kw) "
-                "RETURN a.name, type(r), b.name LIMIT 1",
-                kw=kw
-            )
-            record = result.single()
-            if record:
-                return f"{record['a.name']} --[{record['type(r)']}]--> {record['b.name']}"
-
-    return ""
+    """
+    Expand up to KG_MAX_DEPTH hops around the entities best matching the
+    question, from the snapshot or through the fulltext index.
+    """
+    if traverser is None:
+        return ""
+    try:
+        if snapshot is not None:
+            seeds = snapshot.search_entities(question, limit=KG_SEED_ENTITIES)
+        else:
+            seeds = search_entities(driver, question, limit=KG_SEED_ENTITIES)
+        rows = traverser.traverse(seeds)
+    except Exception as e:
+        print(f"⚠️ KG lookup failed: {e}")
+        return ""
+    return format_relations(rows)
 
 
 # === Valid entity types ===
 ALLOWED_ENTITY_TYPES = {"ORG", "GPE", "PERSON", "NORP", "FAC", "PRODUCT", "LOC", "DATE", "EVENT"}
 
-def sanitize_relation(verb):
-    """Sanitize relation for Cypher."""
-    verb = verb.strip().upper().replace(" ", "_").replace("-", "_")
-    return re.sub(r"[^A-Z0-9_]", "", verb) or "RELATED_TO"
-
 def extract_entities(doc):
     return [(ent.text.strip(), ent.label_) for ent in doc.ents if ent.label_ in ALLOWED_ENTITY_TYPES]
 
-def extract_triples(text):
-    doc = nlp(text)
+def extract_triples_from_doc(doc):
     triples = []
     for sent in doc.sents:
         subj = obj = verb = ""
@@ -120,56 +143,113 @@ def extract_triples(text):
             triples.append((subj.strip(), verb.strip(), obj.strip()))
     return triples
 
-def create_graph_node(tx, name, label):
-    tx.run("MERGE (e:Entity {name: $name, label: $label})", name=name, label=label)
-
-def create_graph_relation(tx, subj, verb, obj):
-    rel_type = sanitize_relation(verb)
-    query = f"""
-    MATCH (a:Entity {{name: $subj}})
-    MATCH (b:Entity {{name: $obj}})
-    MERGE (a)-[:{rel_type}]->(b)
+def write_extraction(writer, entities, triples):
+    """Queue one chunk's entities and triples on ``writer``; it flushes in batches."""
+    for ent, label in entities:
+        writer.add_entity(ent, label)
+    for subj, verb, obj in triples:
+        writer.add_triple(subj, verb, obj)
+
+# === Parallel build: spaCy producers -> bounded queue -> Neo4j writer threads ===
+def _writer_loop(work, writer):
+    while True:
+        item = work.get()
+        if item is None:
+            break
+        i, checkpoint, entities, triples = item
+        try:
+            write_extraction(writer, entities, triples)
+            writer.add_checkpoint(checkpoint)
+        except Exception as e:
+            print(f"  ⚠️ Error writing chunk {i + 1}: {e}")
+    try:
+        writer.flush()
+    except Exception as e:
+        print(f"  ⚠️ Final flush failed: {e}")
+
+def build_graph(store, ledger=None, full=False, n_process=KG_NLP_PROCESSES, nlp_batch=KG_NLP_BATCH,
+                n_writers=KG_WRITERS, queue_size=256):
+    """
+    Parse every new or changed chunk exactly once with nlp.pipe (optionally
+    multi-process) while writer threads push the extracted rows to Neo4j
+    concurrently. With a ledger, chunks whose content hash is already
+    recorded are skipped unless ``full`` is set.
     """
-    tx.run(query, subj=subj, obj=obj)
+    if ledger is not None and full:
+        ledger.reset()
+    done = ledger.done_hashes() if ledger is not None else set()
+
+    total = len(store)
+    todo = []
+    for i in range(total):
+        text = store.text(i)
+        if not text.strip():
+            continue
+        h = chunk_hash(text, store.source(i))
+        if h not in done:
+            todo.append((i, h))
+    print(f"🧾 {len(todo)} new or changed chunks, {total - len(todo)} unchanged or empty")
+
+    run_id = ledger.start_run(full, len(todo)) if ledger is not None else None
+    on_flush = (lambda checkpoints: ledger.mark_done(checkpoints, run_id)) if ledger is not None else None
+
+    work = queue.Queue(maxsize=queue_size)
+    writers = [KGBulkWriter(driver, batch_size=KG_BATCH_SIZE, on_flush=on_flush) for _ in range(n_writers)]
+    threads = [threading.Thread(target=_writer_loop, args=(work, w), daemon=True) for w in writers]
+    for t in threads:
+        t.start()
+
+    texts = ((store.text(i), (i, h)) for i, h in todo)
+    try:
+        docs = get_nlp("kg").pipe(texts, as_tuples=True, n_process=n_process, batch_size=nlp_batch)
+        for doc, (i, h) in docs:
+            source = store.source(i)
+            print(f"\n→ Parsed chunk {i + 1}/{total} from {source}")
+            work.put((i, (h, source), extract_entities(doc), extract_triples_from_doc(doc)))
+    finally:
+        for _ in threads:
+            work.put(None)
+        for t in threads:
+            t.join()
+        if run_id is not None:
+            queued, checkpointed = ledger.finish_run(run_id)
+            print(f"🧾 Checkpointed {checkpointed}/{queued} chunks this run")
+    return writers
 
-def process_chunk(chunk):
-    text = chunk.get("text") or chunk.get("chunk") or ""
-    if not text.strip():
+def main():
+    parser = argparse.ArgumentParser(description="Build the Neo4j knowledge graph from the chunk store.")
+    parser.add_argument("--processes", type=int, default=KG_NLP_PROCESSES, help="spaCy worker processes")
+    parser.add_argument("--nlp-batch", type=int, default=KG_NLP_BATCH, help="texts per nlp.pipe batch")
+    parser.add_argument("--writers", type=int, default=KG_WRITERS, help="Neo4j writer threads")
+    parser.add_argument("--full", action="store_true", help="ignore the ingestion ledger and reprocess every chunk")
+    args = parser.parse_args()
+
+    if driver is None:
+        print("❌ Building the graph needs Neo4j; unset KG_BACKEND=snapshot")
         return
-    doc = nlp(text)
-    source = chunk.get("source", "unknown")
-
-    with driver.session() as session:
-        for ent, label in extract_entities(doc):
-            session.execute_write(create_graph_node, ent, label)
-
-        triples = extract_triples(text)
-        if triples:
-            print(f"   🔗 {len(triples)} triples from {source}")
-        for subj, verb, obj in triples:
-            print(f"      📎 ({subj}) -[{sanitize_relation(verb)}]-> ({obj})")
-            session.execute_write(create_graph_node, subj, "Entity")
-            session.execute_write(create_graph_node, obj, "Entity")
-            session.execute_write(create_graph_relation, subj, verb, obj)
 
-def main():
-    if not Path(CHUNK_FILE).exists():
-        print(f"❌ chunks.json not found at {CHUNK_FILE}")
+    if not Path(CHUNK_STORE_DIR).exists() and find_chunk_records(CHUNK_FILE) is None:
+        print(f"❌ chunks.jsonl not found at {CHUNK_FILE}")
         return
 
     print("🚀 Building Knowledge Graph from chunks...")
-
-    with open(CHUNK_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    for i, chunk in enumerate(data):
-        print(f"\n→ Processing chunk {i + 1}/{len(data)} from {chunk.get('source', 'unknown')}")
-        try:
-            process_chunk(chunk)
-        except Exception as e:
-            print(f"  ⚠️ Error in chunk {i + 1}: {e}")
-
-    print("\n✅ Knowledge Graph successfully built in Neo4j!")
+    ensure_schema(driver)
+
+    store = open_chunk_store(jsonl_path=CHUNK_FILE)
+    writers = build_graph(
+        store,
+        ledger=IngestionLedger(),
+        full=args.full,
+        n_process=args.processes,
+        nlp_batch=args.nlp_batch,
+        n_writers=max(1, args.writers),
+    )
+
+    nodes = sum(w.nodes_written for w in writers)
+    relations = sum(w.relations_written for w in writers)
+    transactions = sum(w.transactions for w in writers)
+    print(f"\n📦 {nodes} nodes, {relations} relations in {transactions} transactions")
+    print("✅ Knowledge Graph successfully built in Neo4j!")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+# backend/kg_ledger.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEDGER_PATH = os.path.join(PROJECT_ROOT, "data", "kg_ledger.sqlite")
+
+
+def chunk_hash(text, source):
+    """Content hash identifying a chunk across runs, independent of its position."""
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class IngestionLedger:
+    """
+    SQLite record of which chunks are already in the knowledge graph.
+
+    A chunk is marked done only after the writer flush containing its last
+    rows has committed, so a crashed run resumes from the last checkpoint.
+    """
+
+    def __init__(self, path=LEDGER_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " hash TEXT PRIMARY KEY, source TEXT, done_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, started_at REAL NOT NULL,"
+                " finished_at REAL, full INTEGER NOT NULL,"
+                " queued INTEGER NOT NULL DEFAULT 0, done INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def done_hashes(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT hash FROM chunks")}
+
+    def mark_done(self, checkpoints, run_id=None):
+        """Record ``(hash, source)`` pairs whose graph writes have committed."""
+        if not checkpoints:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (hash, source, done_at) VALUES (?, ?, ?)",
+                [(h, source, now) for h, source in checkpoints],
+            )
+            if run_id is not None:
+                self._conn.execute("UPDATE runs SET done = done + ? WHERE id = ?", (len(checkpoints), run_id))
+
+    def reset(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+
+    def start_run(self, full, queued):
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (started_at, full, queued) VALUES (?, ?, ?)", (time.time(), int(full), queued)
+            )
+            return cur.lastrowid
+
+    def build_version(self):
+        """Changes whenever a KG build finishes; "" before the first one."""
+        with self._lock:
+            run_id, finished_at = self._conn.execute(
+                "SELECT id, finished_at FROM runs WHERE finished_at IS NOT NULL ORDER BY id DESC LIMIT 1"
+            ).fetchone() or (None, None)
+        return "" if run_id is None else f"{run_id}-{finished_at}"
+
+    def finish_run(self, run_id):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+            return self._conn.execute("SELECT queued, done FROM runs WHERE id = ?", (run_id,)).fetchone()
@@ -0,0 +1,78 @@
+# backend/kg_query.py
+
+import re
+
+# === Schema ===
+ENTITY_FULLTEXT_INDEX = "entity_name_fulltext"
+
+SCHEMA_STATEMENTS = [
+    # Nodes are MERGEd on (name, label), so that pair is the unique key
+    "CREATE CONSTRAINT entity_name_label IF NOT EXISTS "
+    "FOR (e:Entity) REQUIRE (e.name, e.label) IS UNIQUE",
+    # Exact-name lookups (relation MERGEs match on name alone)
+    "CREATE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)",
+    # Keyword search over entity names
+    f"CREATE FULLTEXT INDEX {ENTITY_FULLTEXT_INDEX} IF NOT EXISTS "
+    "FOR (e:Entity) ON EACH [e.name]",
+]
+
+def ensure_schema(driver):
+    """Create the constraint and indexes the KG lookups rely on (idempotent)."""
+    with driver.session() as session:
+        for statement in SCHEMA_STATEMENTS:
+            try:
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"⚠️ Schema statement failed: {statement.split(' IF ')[0]} - {e}")
+
+
+# === Keyword search ===
+PUNCTUATION = "?!.,;:'\"()[]"
+LUCENE_SPECIAL_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+KEYWORD_HITS = 25   # index hits per keyword; bounds prefix matches before they are summed
+
+# Question words that would otherwise become prefix terms matching half the graph
+STOPWORDS = {
+    "what", "which", "when", "where", "whose", "does", "from", "about", "there",
+    "their", "these", "those", "that", "this", "with", "have", "into", "tell",
+    "show", "give", "list", "explain", "describe", "please", "many", "much",
+    "used", "using", "some", "also", "more", "most", "than", "then", "they",
+    "them", "were", "will", "would", "could", "should", "being", "been",
+}
+
+ENTITY_QUERY = f"""
+UNWIND $keywords AS kw
+CALL db.index.fulltext.queryNodes('{ENTITY_FULLTEXT_INDEX}', kw, {{limit: $hits}}) YIELD node, score
+WITH node.name AS name, sum(score) AS relevance
+RETURN name
+ORDER BY relevance DESC
+LIMIT $limit
+"""
+
+def extract_keywords(question):
+    """Question words longer than 3 characters, minus stopwords, de-duplicated, in order."""
+    keywords = []
+    for word in question.split():
+        word = word.strip(PUNCTUATION).lower()
+        if word.endswith("'s"):
+            word = word[:-2]   # "INSAT-3DR's imager" -> insat-3dr
+        if len(word) > 3 and word not in STOPWORDS and word not in keywords:
+            keywords.append(word)
+    return keywords
+
+def to_lucene(keyword):
+    """Exact term or prefix match, with Lucene syntax characters escaped."""
+    escaped = LUCENE_SPECIAL_RE.sub(r"\\\1", keyword)
+    return f"{escaped} OR {escaped}*"
+
+def search_entities(driver, question, limit=3):
+    """Names of the entities best matching the question's keywords, best first."""
+    keywords = [to_lucene(kw) for kw in extract_keywords(question)]
+    if not keywords:
+        return []
+    with driver.session() as session:
+        result = session.run(ENTITY_QUERY, keywords=keywords, hits=KEYWORD_HITS, limit=limit)
+        return [r["name"] for r in result]
+
+def format_relations(rows):
+    return "\n".join(f"{source} --[{relation}]--> {target}" for source, relation, target, _ in rows)
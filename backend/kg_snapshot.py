@@ -0,0 +1,228 @@
+# backend/kg_snapshot.py
+
+import os
+import time
+import json
+import bisect
+from collections import deque
+
+import numpy as np
+
+from kg_query import extract_keywords
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_PATH = os.path.join(PROJECT_ROOT, "data", "kg_snapshot.npz")
+
+NODES_QUERY = "MATCH (e:Entity) RETURN e.name AS name, e.label AS label"
+EDGES_QUERY = "MATCH (a:Entity)-[r]->(b:Entity) RETURN a.name AS source, type(r) AS relation, b.name AS target"
+
+
+def _intern(values):
+    """Distinct values in first-seen order, plus value -> id."""
+    ids = {}
+    for value in values:
+        ids.setdefault(value, len(ids))
+    return list(ids), ids
+
+def _pack(strings):
+    """UTF-8 blob + int64 offsets, the same layout as the chunk store."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack(blob, offsets):
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+# === Snapshot ===
+class KGSnapshot:
+    """
+    Read-only copy of the ``Entity`` graph in CSR form: the outgoing edges of
+    node ``i`` are ``targets[offsets[i]:offsets[i + 1]]`` with relation types
+    ``relations[...]``. Nodes are interned by name, matching how relations are
+    MERGEd between names.
+    """
+
+    def __init__(self, names, labels, label_names, offsets, targets, relations, relation_types, built_at=0.0):
+        self.names = names
+        self.labels = labels
+        self.label_names = label_names
+        self.offsets = offsets
+        self.targets = targets
+        self.relations = relations
+        self.relation_types = relation_types
+        self.built_at = float(built_at)
+        self.version = f"{self.built_at:.6f}-{len(names)}-{len(targets)}"
+        self._ids = {name: i for i, name in enumerate(names)}
+        self._build_token_index()
+
+    @classmethod
+    def from_graph(cls, nodes, edges, built_at=None):
+        """Build from ``(name, label)`` nodes and ``(source, relation, target)`` edges."""
+        nodes, edges = list(nodes), list(dict.fromkeys(edges))
+        names, ids = _intern([name for name, _ in nodes] + [n for s, _, t in edges for n in (s, t)])
+
+        # A name MERGEd under several labels keeps the most specific one
+        label_names, label_ids = _intern(["Entity"] + [label or "Entity" for _, label in nodes])
+        labels = np.zeros(len(names), dtype=np.int32)
+        for name, label in nodes:
+            if label and label != "Entity":
+                labels[ids[name]] = label_ids[label]
+
+        relation_types, rel_ids = _intern(rel for _, rel, _ in edges)
+        src = np.array([ids[s] for s, _, _ in edges], dtype=np.int64)
+        dst = np.array([ids[t] for _, _, t in edges], dtype=np.int32)
+        rel = np.array([rel_ids[r] for _, r, _ in edges], dtype=np.int32)
+
+        order = np.argsort(src, kind="stable")
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(names)), out=offsets[1:])
+        return cls(names, labels, label_names, offsets, dst[order], rel[order], relation_types,
+                   built_at=time.time() if built_at is None else built_at)
+
+    # --- Persistence ---
+    def save(self, path=SNAPSHOT_PATH):
+        blob, name_offsets = _pack(self.names)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            name_blob=blob,
+            name_offsets=name_offsets,
+            labels=self.labels,
+            offsets=self.offsets,
+            targets=self.targets,
+            relations=self.relations,
+            meta=np.frombuffer(json.dumps({
+                "label_names": self.label_names,
+                "relation_types": self.relation_types,
+                "built_at": self.built_at,
+            }).encode("utf-8"), dtype=np.uint8),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            return cls(
+                _unpack(data["name_blob"], data["name_offsets"]),
+                data["labels"],
+                meta["label_names"],
+                data["offsets"],
+                data["targets"],
+                data["relations"],
+                meta["relation_types"],
+                built_at=meta["built_at"],
+            )
+
+    # --- Lookups ---
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def label(self, name):
+        i = self._ids.get(name)
+        return None if i is None else self.label_names[self.labels[i]]
+
+    def _out(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return zip(self.relations[start:end].tolist(), self.targets[start:end].tolist())
+
+    def neighbors(self, name):
+        """Outgoing ``(relation, target)`` pairs of an entity, [] if unknown."""
+        i = self._ids.get(name)
+        if i is None:
+            return []
+        return [(self.relation_types[r], self.names[t]) for r, t in self._out(i)]
+
+    def path(self, source, target, max_depth=4):
+        """Shortest directed path as ``(source, relation, target)`` hops, or None."""
+        start, goal = self._ids.get(source), self._ids.get(target)
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return []
+        parent = {start: None}
+        frontier = deque([(start, 0)])
+        while frontier:
+            node, depth = frontier.popleft()
+            if depth == max_depth:
+                continue
+            for r, t in self._out(node):
+                if t in parent:
+                    continue
+                parent[t] = (node, r)
+                if t == goal:
+                    hops = []
+                    while parent[t] is not None:
+                        prev, rel = parent[t]
+                        hops.append((self.names[prev], self.relation_types[rel], self.names[t]))
+                        t = prev
+                    return hops[::-1]
+                frontier.append((t, depth + 1))
+        return None
+
+    # --- Keyword search (same contract as kg_query.search_entities) ---
+    def _build_token_index(self):
+        postings = {}
+        for i, name in enumerate(self.names):
+            for token in set(name.lower().split()):
+                postings.setdefault(token, []).append(i)
+        self._postings = postings
+        self._tokens = sorted(postings)
+
+    def _match(self, keyword):
+        """Node ids whose name has a token equal to, or starting with, ``keyword``."""
+        matched = set(self._postings.get(keyword, ()))
+        pos = bisect.bisect_left(self._tokens, keyword)
+        while pos < len(self._tokens) and self._tokens[pos].startswith(keyword):
+            matched.update(self._postings[self._tokens[pos]])
+            pos += 1
+        return matched
+
+    def _scores(self, question):
+        scores = {}
+        for keyword in extract_keywords(question):
+            for i in self._match(keyword):
+                scores[i] = scores.get(i, 0.0) + 1.0
+        return scores
+
+    def search_entities(self, question, limit=3):
+        """Names of the entities matching the most question keywords, best first."""
+        scores = self._scores(question)
+        return [self.names[i] for i in sorted(scores, key=lambda i: (-scores[i], i))[:limit]]
+
+
+# === Export from Neo4j ===
+def export_snapshot(driver, path=SNAPSHOT_PATH):
+    """Dump the Neo4j ``Entity`` graph to a CSR snapshot file."""
+    with driver.session() as session:
+        nodes = [(r["name"], r["label"]) for r in session.run(NODES_QUERY)]
+        edges = [(r["source"], r["relation"], r["target"]) for r in session.run(EDGES_QUERY)]
+    snapshot = KGSnapshot.from_graph(nodes, edges)
+    snapshot.save(path)
+    return snapshot
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    if not os.path.exists(path):
+        print(f"⚠️ KG snapshot not found at {path}; run `python kg_snapshot.py` first")
+        return None
+    snapshot = KGSnapshot.load(path)
+    print(f"✅ KG snapshot loaded: {len(snapshot)} entities, {snapshot.edge_count} relations")
+    return snapshot
+
+
+if __name__ == "__main__":
+    from kg_interface import driver
+
+    if driver is None:
+        print("❌ KG_BACKEND=snapshot has no Neo4j driver to export from; unset it for the export")
+    else:
+        print("📤 Exporting the Neo4j knowledge graph...")
+        snapshot = export_snapshot(driver)
+        print(f"✅ Snapshot saved to {SNAPSHOT_PATH}: {len(snapshot)} entities, {snapshot.edge_count} relations")
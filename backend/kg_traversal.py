@@ -0,0 +1,131 @@
+# backend/kg_traversal.py
+
+import time
+import threading
+
+from answer_cache import MemoryCache
+
+# === Traversal Parameters ===
+DEFAULT_DEPTH = 2
+DEFAULT_FANOUT = 5
+DEFAULT_MAX_VISITED = 25
+DEFAULT_CACHE_SIZE = 1024
+VERSION_CHECK_INTERVAL = 5.0   # seconds between build-version checks
+NEIGHBORHOOD_TTL = 24 * 60 * 60
+
+# One round trip per hop: the whole frontier is expanded together
+EXPAND_QUERY = """
+UNWIND $names AS name
+MATCH (a:Entity {name: name})-[r]->(b:Entity)
+WITH a.name AS source, collect(DISTINCT {relation: type(r), target: b.name})[..$fanout] AS out
+RETURN source, out
+"""
+
+
+# === Neighbor fetchers: frontier names -> {name: [(relation, target), ...]} ===
+def neo4j_fetcher(driver):
+    def fetch(names, fanout):
+        with driver.session() as session:
+            result = session.run(EXPAND_QUERY, names=list(names), fanout=fanout)
+            return {r["source"]: [(o["relation"], o["target"]) for o in r["out"]] for r in result}
+    return fetch
+
+def snapshot_fetcher(snapshot):
+    def fetch(names, fanout):
+        return {name: snapshot.neighbors(name)[:fanout] for name in names}
+    return fetch
+
+
+def expand(fetch, entity, depth=DEFAULT_DEPTH, fanout=DEFAULT_FANOUT, max_visited=DEFAULT_MAX_VISITED):
+    """
+    Breadth-first ``(source, relation, target, hop)`` edges up to ``depth``
+    hops out of ``entity``, at most ``fanout`` edges per node. Stops as soon
+    as ``max_visited`` distinct nodes have been reached.
+    """
+    visited = {entity}
+    frontier = [entity]
+    edges = []
+    for hop in range(1, depth + 1):
+        if not frontier:
+            break
+        neighbors = fetch(frontier, fanout)
+        next_frontier = []
+        for source in frontier:
+            for relation, target in neighbors.get(source, ()):
+                edges.append((source, relation, target, hop))
+                if target not in visited:
+                    visited.add(target)
+                    next_frontier.append(target)
+                    if len(visited) >= max_visited:
+                        return edges
+        frontier = next_frontier
+    return edges
+
+
+# === Cached traversal ===
+class KGTraverser:
+    """
+    Multi-hop expansion around seed entities with an LRU of expanded
+    neighborhoods keyed by entity. The cache is dropped whenever
+    ``version_fn`` reports a new KG build, checked at most every
+    ``VERSION_CHECK_INTERVAL`` seconds.
+    """
+
+    def __init__(self, fetch, version_fn=None, depth=DEFAULT_DEPTH, fanout=DEFAULT_FANOUT,
+                 max_visited=DEFAULT_MAX_VISITED, cache_size=DEFAULT_CACHE_SIZE):
+        self.fetch = fetch
+        self.version_fn = version_fn or (lambda: "")
+        self.depth = depth
+        self.fanout = fanout
+        self.max_visited = max_visited
+        self.cache_size = cache_size
+        self._cache = MemoryCache(max_entries=cache_size, ttl=NEIGHBORHOOD_TTL)
+        self._lock = threading.Lock()
+        self._version = self.version_fn()
+        self._checked_at = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        now = time.time()
+        if now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            version = self.version_fn()
+            if version != self._version:
+                print(f"♻️ KG rebuilt ({self._version or 'none'} -> {version}); dropping cached neighborhoods")
+                self._version = version
+                self._cache = MemoryCache(max_entries=self.cache_size, ttl=NEIGHBORHOOD_TTL)
+
+    def neighborhood(self, entity):
+        self._check_version()
+        cache = self._cache
+        edges = cache.get(entity)
+        if edges is not None:
+            self.hits += 1
+            return edges
+        self.misses += 1
+        edges = expand(self.fetch, entity, self.depth, self.fanout, self.max_visited)
+        cache.set(entity, edges)
+        return edges
+
+    def traverse(self, seeds):
+        """Merged neighborhoods of ``seeds`` (best first), capped at ``max_visited`` nodes overall."""
+        visited = set()
+        seen_edges = set()
+        edges = []
+        for seed in seeds:
+            visited.add(seed)
+            for source, relation, target, hop in self.neighborhood(seed):
+                if (source, relation, target) in seen_edges:
+                    continue
+                if target not in visited and len(visited) >= self.max_visited:
+                    return edges
+                seen_edges.add((source, relation, target))
+                visited.add(target)
+                edges.append((source, relation, target, hop))
+        return edges
+
+    def stats(self):
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses, "version": self._version}
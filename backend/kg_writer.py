@@ -0,0 +1,114 @@
+# backend/kg_writer.py
+
+import re
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def sanitize_relation(verb):
+    """Sanitize relation for Cypher."""
+    verb = verb.strip().upper().replace(" ", "_").replace("-", "_")
+    return re.sub(r"[^A-Z0-9_]", "", verb) or "RELATED_TO"
+
+
+# === Batched transactions ===
+def merge_nodes(tx, rows):
+    tx.run(
+        "UNWIND $rows AS row "
+        "MERGE (e:Entity {name: row.name, label: row.label})",
+        rows=rows,
+    )
+
+def merge_relations(tx, rel_type, rows):
+    # Relationship types cannot be parameterized, so each batch holds a single type
+    tx.run(
+        "UNWIND $rows AS row "
+        "MATCH (a:Entity {name: row.subj}) "
+        "MATCH (b:Entity {name: row.obj}) "
+        f"MERGE (a)-[:{rel_type}]->(b)",
+        rows=rows,
+    )
+
+def _batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+# === Bulk writer ===
+class KGBulkWriter:
+    """
+    Buffers entity nodes and triples across chunks and writes them with
+    ``UNWIND $rows`` batches, one transaction per batch.
+
+    Nodes are always flushed before relations so every relation finds its
+    endpoints. Checkpoints added after a chunk's rows are handed to
+    ``on_flush`` once the flush that wrote those rows has committed.
+    """
+
+    def __init__(self, driver, batch_size=DEFAULT_BATCH_SIZE, on_flush=None):
+        self.driver = driver
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self._checkpoints = []
+        self._nodes = {}        # (name, label) -> None, insertion-ordered set
+        self._relations = {}    # rel_type -> {(subj, obj): None}
+        self._pending = 0
+        self.nodes_written = 0
+        self.relations_written = 0
+        self.transactions = 0
+
+    def add_entity(self, name, label):
+        if (name, label) not in self._nodes:
+            self._nodes[(name, label)] = None
+            self._pending += 1
+            self._maybe_flush()
+
+    def add_triple(self, subj, verb, obj):
+        self.add_entity(subj, "Entity")
+        self.add_entity(obj, "Entity")
+        pairs = self._relations.setdefault(sanitize_relation(verb), {})
+        if (subj, obj) not in pairs:
+            pairs[(subj, obj)] = None
+            self._pending += 1
+            self._maybe_flush()
+
+    def add_checkpoint(self, token):
+        self._checkpoints.append(token)
+
+    def _maybe_flush(self):
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            self._commit_checkpoints()
+            return
+        node_rows = [{"name": name, "label": label} for name, label in self._nodes]
+        with self.driver.session() as session:
+            for rows in _batches(node_rows, self.batch_size):
+                session.execute_write(merge_nodes, rows)
+                self.transactions += 1
+            for rel_type, pairs in self._relations.items():
+                rel_rows = [{"subj": subj, "obj": obj} for subj, obj in pairs]
+                for rows in _batches(rel_rows, self.batch_size):
+                    session.execute_write(merge_relations, rel_type, rows)
+                    self.transactions += 1
+
+        self.nodes_written += len(node_rows)
+        self.relations_written += sum(len(pairs) for pairs in self._relations.values())
+        self._nodes.clear()
+        self._relations.clear()
+        self._pending = 0
+        self._commit_checkpoints()
+
+    def _commit_checkpoints(self):
+        checkpoints, self._checkpoints = self._checkpoints, []
+        if checkpoints and self.on_flush is not None:
+            self.on_flush(checkpoints)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,180 @@
+# backend/llm_gateway.py
+
+import re
+import time
+import hashlib
+import threading
+
+from utils.secrets_loader import get_secret
+
+# === Gateway Parameters ===
+DEFAULT_MODEL = "models/gemini-1.5-flash"
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 30.0
+FOLLOWER_GRACE = 1.0   # seconds past the leader's deadline a coalesced caller still waits
+
+
+class LLMTimeoutError(Exception):
+    """No concurrency slot (or coalesced result) became available in time."""
+
+
+# === Backends ===
+class GeminiBackend:
+    """Long-lived Gemini client: configured once, one model handle reused for every call."""
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL):
+        import google.generativeai as genai
+
+        if not api_key:
+            raise ValueError("❌ GEMINI_API_KEY not found in .env or Streamlit secrets")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name=model_name)
+
+    def generate(self, prompt, timeout):
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        return response.text.strip()
+
+    def stream(self, prompt, timeout):
+        for chunk in self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout}):
+            if chunk.text:
+                yield chunk.text
+
+class StubBackend:
+    """
+    Deterministic offline backend for load tests and local runs.
+
+    The answer depends only on the prompt, and ``latency`` simulates the
+    upstream round trip.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def generate(self, prompt, timeout):
+        time.sleep(self.latency)
+        return self._answer(prompt)
+
+    def stream(self, prompt, timeout):
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
+
+    @staticmethod
+    def _answer(prompt):
+        questions = re.findall(r"^Q: (.*)$", prompt, flags=re.MULTILINE)
+        question = questions[-1].strip() if questions else prompt.strip()[:80]
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"[stub {digest}] This is a canned answer to: {question}"
+
+
+# === Gateway ===
+class _InflightCall:
+    def __init__(self, deadline):
+        self.deadline = deadline   # time.monotonic() by which the leader gives up
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class LLMGateway:
+    """
+    Single entry point for LLM calls.
+
+    - at most ``max_concurrency`` upstream calls run at once
+    - each call is bounded by ``timeout`` seconds, slot wait and generation together
+    - identical prompts already in flight are coalesced into one upstream call;
+      followers wait for the leader's deadline, not a fresh timeout
+    """
+
+    def __init__(self, backend, max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+        self.backend = backend
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    def _acquire_slot(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0 or not self._slots.acquire(timeout=timeout):
+            raise LLMTimeoutError(f"no LLM slot free within {self.timeout}s")
+
+    def generate(self, prompt):
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InflightCall(time.monotonic() + self.timeout)
+            else:
+                self.coalesced_calls += 1
+
+        if not leader:
+            if not call.done.wait(max(0.0, call.deadline - time.monotonic()) + FOLLOWER_GRACE):
+                raise LLMTimeoutError(f"coalesced LLM call did not finish within {self.timeout}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            self._acquire_slot(call.deadline - time.monotonic())
+            try:
+                remaining = call.deadline - time.monotonic()
+                if remaining <= 0:
+                    raise LLMTimeoutError(f"LLM slot freed too late to answer within {self.timeout}s")
+                with self._lock:
+                    self.upstream_calls += 1
+                call.result = self.backend.generate(prompt, remaining)
+            finally:
+                self._slots.release()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stream(self, prompt):
+        """
+        Yield answer text incrementally; holds a concurrency slot until
+        exhausted. Like ``generate``, slot wait and generation share one
+        ``timeout``.
+        """
+        deadline = time.monotonic() + self.timeout
+        self._acquire_slot(deadline - time.monotonic())
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError(f"LLM slot freed too late to answer within {self.timeout}s")
+            with self._lock:
+                self.upstream_calls += 1
+            yield from self.backend.stream(prompt, remaining)
+        finally:
+            self._slots.release()
+
+
+# === Shared instance ===
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    """Process-wide gateway, built on first use from secrets (LLM_BACKEND=gemini|stub)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            if get_secret("LLM_BACKEND", default="gemini").lower() == "stub":
+                backend = StubBackend(latency=float(get_secret("LLM_STUB_LATENCY", default=0.0)))
+            else:
+                backend = GeminiBackend(
+                    get_secret("GEMINI_API_KEY"),
+                    model_name=get_secret("GEMINI_MODEL", default=DEFAULT_MODEL),
+                )
+            _gateway = LLMGateway(
+                backend,
+                max_concurrency=int(get_secret("LLM_MAX_CONCURRENCY", default=DEFAULT_MAX_CONCURRENCY)),
+                timeout=float(get_secret("LLM_TIMEOUT", default=DEFAULT_TIMEOUT)),
+            )
+        return _gateway
@@ -1,9 +1,21 @@
 # backend/main.py
 
-from fastapi import FastAPI
+import json
+import time
+from typing import List
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from model_selector import route_query  # make sure this exists in the same folder
+from model_selector import route_query, route_query_stream, route_batch  # make sure this exists in the same folder
+from rag_pipeline import answer_cache
+from kg_interface import traverser
+from utils.secrets_loader import get_secret
+
+# === Batch limits (server-side; clients can ask for less, never more) ===
+BATCH_MAX_QUESTIONS = int(get_secret("BATCH_MAX_QUESTIONS", default=64))
+BATCH_MAX_WORKERS = int(get_secret("BATCH_MAX_WORKERS", default=4))
+BATCH_MAX_PROCESSES = int(get_secret("BATCH_MAX_PROCESSES", default=1))
 
 app = FastAPI()
 
@@ -20,6 +32,11 @@ app.add_middleware(
 class QueryInput(BaseModel):
     question: str
 
+class BatchQueryInput(BaseModel):
+    questions: List[str]
+    max_workers: int = 4
+    n_process: int = 1
+
 # Root endpoint
 @app.get("/")
 def root():
@@ -32,6 +49,55 @@ def ask(query: QueryInput):
     response = route_query(query.question)
     return {"answer": response}
 
+# Streaming endpoint: Server-Sent Events, one JSON event per message
+@app.post("/ask/stream")
+def ask_stream(query: QueryInput):
+    print(f"Received streaming question: {query.question}")
+
+    def events():
+        try:
+            for event in route_query_stream(query.question):
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            # The 200 and headers are already sent; tell the client instead of just closing
+            print(f"⚠️ Stream failed: {e}")
+            event = {"event": "error", "message": "⚠️ The answer could not be completed. Please try again."}
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Batch endpoint: intent detection runs once over all questions with nlp.pipe
+@app.post("/ask/batch")
+def ask_batch(query: BatchQueryInput):
+    print(f"Received batch of {len(query.questions)} questions")
+    if len(query.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many questions: {len(query.questions)} > {BATCH_MAX_QUESTIONS}",
+        )
+    started = time.perf_counter()
+    results, nlp_seconds = route_batch(
+        query.questions,
+        max_workers=min(BATCH_MAX_WORKERS, max(1, query.max_workers)),
+        n_process=min(BATCH_MAX_PROCESSES, max(1, query.n_process)),
+    )
+    return {
+        "results": results,
+        "nlp_seconds": round(nlp_seconds, 4),
+        "total_seconds": round(time.perf_counter() - started, 4),
+    }
+
+# Answer cache and KG neighborhood cache counters
+@app.get("/cache/stats")
+def cache_stats():
+    stats = answer_cache.stats()
+    stats["kg_neighborhoods"] = traverser.stats() if traverser is not None else None
+    return stats
+
 # Optional alias for backward compatibility
 @app.post("/query")
 def query_compat(query: QueryInput):
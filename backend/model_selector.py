@@ -1,11 +1,13 @@
 # backend/model_selector.py
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from nlp_engine import detect_intent_and_entities
+from nlp_engine import detect_intent, detect_intents_batch
 from kg_interface import query_neo4j
-from rag_pipeline import query_rag
+from rag_pipeline import query_rag, query_rag_stream
 from geo_module.geo_utils import query_geo
 
 
@@ -24,8 +26,10 @@ from geo_module.geo_utils import query_geo
 #         return "Sorry, I couldn't understand your query."
 
 def route_query(question: str) -> str:
-    intent, entities = detect_intent_and_entities(question)
+    intent = detect_intent(question)
+    return answer_for_intent(question, intent)
 
+def answer_for_intent(question: str, intent: str) -> str:
     if intent == "geo":
         return query_geo(question)
 
@@ -38,4 +42,63 @@ def route_query(question: str) -> str:
             return f"🧠 Fallback RAG Answer: {fallback}"
 
     # Default to RAG for general queries
-    return f"🧠 RAG Answer: {query_rag(question)}"
\ No newline at end of file
+    return f"🧠 RAG Answer: {query_rag(question)}"
+
+# Streaming counterpart of route_query. Yields event dicts:
+#   {"event": "token", "text": "..."}   incremental RAG output
+#   {"event": "final", "intent": "...", "answer": "..."}   always last, same text route_query returns
+def route_query_stream(question: str):
+    intent = detect_intent(question)
+
+    if intent == "geo":
+        yield {"event": "final", "intent": intent, "answer": query_geo(question)}
+        return
+
+    prefix = "🧠 RAG Answer: "
+    if intent == "kg":
+        answer = query_neo4j(question)
+        if answer:
+            yield {"event": "final", "intent": intent, "answer": f"🔎 KG Answer: {answer}"}
+            return
+        prefix = "🧠 Fallback RAG Answer: "
+
+    parts = []
+    for text in query_rag_stream(question):
+        parts.append(text)
+        yield {"event": "token", "text": text}
+    yield {"event": "final", "intent": intent, "answer": prefix + "".join(parts).strip()}
+
+# Batch routing: one spaCy pass over all questions, then every question is
+# answered on a bounded thread pool. Results come back in input order; a
+# question whose answer fails gets an "error" entry instead of failing the batch.
+def route_batch(questions, max_workers=4, n_process=1):
+    started = time.perf_counter()
+    detected = detect_intents_batch(questions, n_process=n_process)
+    nlp_seconds = time.perf_counter() - started
+
+    def timed_answer(i, intent):
+        t0 = time.perf_counter()
+        try:
+            return answer_for_intent(questions[i], intent), None, time.perf_counter() - t0
+        except Exception as e:
+            print(f"[!] Batch question {i} failed: {e}")
+            return None, str(e), time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(timed_answer, i, intent) for i, (intent, _entities) in enumerate(detected)]
+        results = []
+        for i, future in enumerate(futures):
+            intent, entities = detected[i]
+            answer, error, seconds = future.result()
+            result = {
+                "question": questions[i],
+                "intent": intent,
+                "entities": entities,
+                "answer": answer,
+                "seconds": round(seconds, 4),
+            }
+            if error is not None:
+                result["error"] = error
+            results.append(result)
+
+    return results, nlp_seconds
@@ -1,29 +1,83 @@
 # backend/nlp_engine.py
 
-import spacy
+import re
+from functools import lru_cache
 
-# Load spaCy English model
-nlp = spacy.load("en_core_web_sm")
+from nlp_registry import get_nlp
+
+# spaCy is loaded lazily and shared through nlp_registry; intent detection
+# alone skips NER, entity extraction adds it back.
 
 # Keywords to identify intent categories
 GEO_KEYWORDS = ["map", "region", "location", "coordinates", "area", "where", "place", "boundary", "state", "district"]
 KG_VERBS = ["is", "was", "are", "relate", "define", "connect", "associate"]
 RAG_KEYWORDS = ["explain", "describe", "document", "how", "why", "detail"]
 
-def detect_intent_and_entities(text):
-    doc = nlp(text)
-    lowered = text.lower()
+INTENT_CACHE_SIZE = 4096
+
+def _word_pattern(words):
+    """
+    One compiled regex matching any keyword as a whole word, plurals included
+    ("states", "maps" but not "statement").
+    """
+    alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})(?:s|es)?\b", re.IGNORECASE)
+
+GEO_RE = _word_pattern(GEO_KEYWORDS)
+RAG_RE = _word_pattern(RAG_KEYWORDS)
+# Coordinates ("20N 85E", "20.5° N") are geo on their own; "near" only next to a known place
+COORD_RE = re.compile(r"\b\d+(?:\.\d+)?\s*°?\s*[NSEW]\b", re.IGNORECASE)
+NEAR_RE = re.compile(r"\b(?:near|nearby|around|close to)\b(?!-)", re.IGNORECASE)
+# Inflections of the KG verbs ("relates", "defined", ...). is/was/are lemmatize
+# to "be" and so can never pass the lemma check below; they don't warrant a parse.
+KG_VERB_RE = re.compile(
+    r"\b(?:%s)\w*\b" % "|".join(re.escape(v.rstrip("e")) for v in KG_VERBS if len(v) > 3),
+    re.IGNORECASE,
+)
+
+def _names_place(text):
+    # Imported late: the gazetteer is only loaded once a question says "near"
+    from geo_module.geo_utils import get_gazetteer
+    return bool(get_gazetteer().match(text))
+
+def _is_geo(text):
+    if GEO_RE.search(text) or COORD_RE.search(text):
+        return True
+    return NEAR_RE.search(text) is not None and _names_place(text)
+
+def _rule_intent(text):
+    """Keyword rules; returns None only when the dependency parse has to decide."""
+    if _is_geo(text):
+        return "geo"
+    if RAG_RE.search(text) or not KG_VERB_RE.search(text):
+        return "rag"
+    return None
+
+def _parse_intent(doc):
+    if any(token.dep_ == "nsubj" for token in doc) and any(token.pos_ == "VERB" and token.lemma_ in KG_VERBS for token in doc):
+        return "kg"
+    return "rag"
+
+def _classify(doc, text):
+    return _rule_intent(text) or _parse_intent(doc)
 
-    # Extract named entities
-    entities = [(ent.text, ent.label_) for ent in doc.ents]
+def _entities(doc):
+    return [(ent.text, ent.label_) for ent in doc.ents]
 
-    # Detect intent
-    if any(word in lowered for word in GEO_KEYWORDS):
-        intent = "geo"
-    elif any(token.dep_ == "nsubj" for token in doc) and any(token.pos_ == "VERB" and token.lemma_ in KG_VERBS for token in doc):
-        intent = "kg"
-    else:
-        intent = "rag"
+@lru_cache(maxsize=INTENT_CACHE_SIZE)
+def _cached_intent(text):
+    return _rule_intent(text) or _parse_intent(get_nlp("intent")(text))
+
+def detect_intent(text):
+    """Intent only: keyword rules first, tagger/parser only when they are not decisive."""
+    intent = _cached_intent(text.strip())
+    print(f"🔍 Input: {text}")
+    print(f"📌 Intent: {intent}")
+    return intent
+
+def detect_intent_and_entities(text):
+    doc = get_nlp("kg")(text)
+    intent, entities = _classify(doc, text), _entities(doc)
 
     # Optional: Print for debug
     print(f"🔍 Input: {text}")
@@ -31,3 +85,17 @@ def detect_intent_and_entities(text):
     print(f"🧠 Entities: {entities}")
 
     return intent, entities
+
+def detect_intents_batch(texts, batch_size=64, n_process=1):
+    """Classify many questions with nlp.pipe; results follow input order."""
+    texts = list(texts)
+    intents = [_rule_intent(text) for text in texts]
+
+    # Only the questions the rules could not settle go through the parser
+    undecided = [i for i, intent in enumerate(intents) if intent is None]
+    docs = get_nlp("intent").pipe((texts[i] for i in undecided), batch_size=batch_size, n_process=n_process)
+    for i, doc in zip(undecided, docs):
+        intents[i] = _parse_intent(doc)
+
+    docs = get_nlp("entities").pipe(texts, batch_size=batch_size, n_process=n_process)
+    return [(intent, _entities(doc)) for intent, doc in zip(intents, docs)]
@@ -0,0 +1,61 @@
+# backend/nlp_registry.py
+
+import threading
+
+import spacy
+
+MODEL_NAME = "en_core_web_sm"
+
+# Components each caller actually needs. Shared tok2vec layers are pulled in
+# automatically for any component that listens to them.
+VIEWS = {
+    "intent": ("tagger", "attribute_ruler", "lemmatizer", "parser"),   # dep_, pos_, lemma_
+    "entities": ("ner",),                                               # doc.ents only
+    "kg": ("tagger", "attribute_ruler", "lemmatizer", "parser", "ner"), # ents + triples
+}
+
+_nlp = None
+_views = {}
+_lock = threading.Lock()
+
+
+class NLPView:
+    """The shared pipeline with everything outside ``enable`` disabled per call."""
+
+    def __init__(self, nlp, enable):
+        enable = set(enable)
+        for name, proc in nlp.pipeline:
+            listeners = getattr(proc, "listening_components", None) or []
+            if enable.intersection(listeners):
+                enable.add(name)
+        self.nlp = nlp
+        self.disable = [name for name in nlp.pipe_names if name not in enable]
+
+    def __call__(self, text):
+        return self.nlp(text, disable=self.disable)
+
+    def pipe(self, texts, **kwargs):
+        return self.nlp.pipe(texts, disable=self.disable, **kwargs)
+
+
+def get_base():
+    """Load the spaCy model once per process, on first use."""
+    global _nlp
+    with _lock:
+        if _nlp is None:
+            try:
+                # senter is disabled in the packaged pipeline; don't load its weights at all
+                _nlp = spacy.load(MODEL_NAME, exclude=["senter"])
+            except OSError:
+                raise RuntimeError(
+                    f"The spaCy model '{MODEL_NAME}' is not installed. "
+                    "Add it to requirements.txt as a wheel URL or run: python -m spacy download en_core_web_sm"
+                )
+        return _nlp
+
+def get_nlp(purpose):
+    """Purpose-specific view ("intent", "entities", "kg") over the shared model."""
+    view = _views.get(purpose)
+    if view is None:
+        view = _views[purpose] = NLPView(get_base(), VIEWS[purpose])
+    return view
@@ -1,56 +1,58 @@
-import os
-import json
-import google.generativeai as genai
 from utils.secrets_loader import get_secret
-
-# 🔐 Load Gemini API Key from secrets.toml or .env
-GEMINI_API_KEY = get_secret("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY not found in .env or Streamlit secrets")
-
-# 🔧 Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-
-# 📄 Load data chunks
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-CHUNKS_PATH = os.path.join(PROJECT_ROOT, "data", "chunks.json")
-
-try:
-    with open(CHUNKS_PATH, "r", encoding="utf-8") as f:
-        chunks = json.load(f)
-except FileNotFoundError:
-    print(f"❌ chunks.json not found at {CHUNKS_PATH}")
-    chunks = []
-
-# 🤖 Main RAG Query Function
-def query_rag(query_text: str) -> str:
+from retriever import BM25Index
+from chunk_store import open_chunk_store
+from context_builder import build_context
+from answer_cache import AnswerCache, cache_key
+from llm_gateway import get_gateway
+
+# 🔧 Shared LLM gateway (Gemini client configured once; LLM_BACKEND=stub runs offline)
+gateway = get_gateway()
+
+# 📄 Open the chunk store (mmap'd; falls back to data/chunks.jsonl)
+chunks = open_chunk_store()
+
+# 🔎 Build the retriever once at load time ("bm25" keyword or "vector" dense mode)
+RAG_TOP_K = int(get_secret("RAG_TOP_K", default=5))
+RAG_CONTEXT_TOKENS = int(get_secret("RAG_CONTEXT_TOKENS", default=1500))
+RAG_RETRIEVAL_MODE = get_secret("RAG_RETRIEVAL_MODE", default="bm25").lower()
+
+index = None
+if RAG_RETRIEVAL_MODE == "vector":
+    from vector_index import load_vector_index
+    index = load_vector_index(chunks)
+if index is None:
+    index = BM25Index.from_texts(chunks.texts())
+
+# 💾 Answer cache (in-process LRU, plus a shared SQLite file if ANSWER_CACHE_PATH is set)
+answer_cache = AnswerCache(
+    max_entries=int(get_secret("ANSWER_CACHE_SIZE", default=1024)),
+    ttl=int(get_secret("ANSWER_CACHE_TTL", default=24 * 60 * 60)),
+    path=get_secret("ANSWER_CACHE_PATH"),
+)
+
+# 🧱 Retrieval + prompt assembly shared by the blocking and streaming paths
+def prepare_prompt(query_text: str):
+    """Return ``(reply, prompt, key)``; ``reply`` is set when no Gemini call is needed."""
     query_text = query_text.strip()
     if not query_text:
-        return "⚠️ Please enter a valid question."
+        return "⚠️ Please enter a valid question.", None, None
 
     # Handle greetings or vague inputs
     if query_text.lower() in {"hey", "hi", "hello", "okay"}:
-        return "👋 Hello! Ask me something like 'What is Oceansat-3?' or 'Show me Gujarat on map.'"
-
-    query_words = set(query_text.lower().split())
-    matched_chunk = None
-    max_match_score = 0
-
-    # 🧠 Match query with best chunk
-    for chunk in chunks:
-        text = chunk.get("text") or chunk.get("chunk") or ""
-        if not text.strip():
-            continue
+        return "👋 Hello! Ask me something like 'What is Oceansat-3?' or 'Show me Gujarat on map.'", None, None
 
-        text_lower = text.lower()
-        match_score = sum(1 for word in query_words if word in text_lower)
+    # 🧠 Rank chunks against the query
+    hits = index.search(query_text, k=RAG_TOP_K)
+    if not hits:
+        return "⚠️ No relevant information found in MOSDAC content.", None, None
 
-        if match_score > max_match_score:
-            matched_chunk = text.strip()
-            max_match_score = match_score
+    # 🧩 Merge neighbouring chunks, drop overlap, pack into the token budget
+    context, chunk_ids = build_context(hits, chunks, token_budget=RAG_CONTEXT_TOKENS)
 
-    if not matched_chunk:
-        return "⚠️ No relevant information found in MOSDAC content."
+    key = cache_key(query_text, chunk_ids, corpus_version=chunks.version)
+    cached = answer_cache.get(key)
+    if cached is not None:
+        return cached, None, key
 
     # 📨 Prompt for Gemini
     prompt = f"""
@@ -59,17 +61,41 @@ You are a helpful AI assistant with expertise in Indian satellite data and MOSDA
 Answer the user's question using the following context:
 
 ---
-{matched_chunk}
+{context}
 ---
 
 Q: {query_text}
 A:"""
+    return None, prompt, key
+
+# 🤖 Main RAG Query Function
+def query_rag(query_text: str) -> str:
+    reply, prompt, key = prepare_prompt(query_text)
+    if reply is not None:
+        return reply
 
     try:
-        model = genai.GenerativeModel(model_name="models/gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text.strip()
-        
+        answer = gateway.generate(prompt)
+        answer_cache.set(key, answer)
+        return answer
 
     except Exception as e:
         return f"❌ Gemini failed to answer: {e}"
+
+# 🌊 Streaming variant: yields answer text as Gemini produces it
+def query_rag_stream(query_text: str):
+    reply, prompt, key = prepare_prompt(query_text)
+    if reply is not None:
+        yield reply
+        return
+
+    parts = []
+    try:
+        for text in gateway.stream(prompt):
+            parts.append(text)
+            yield text
+    except Exception as e:
+        yield f"❌ Gemini failed to answer: {e}"
+        return
+
+    answer_cache.set(key, "".join(parts).strip())
@@ -0,0 +1,76 @@
+# backend/retriever.py
+
+import math
+import re
+import heapq
+from collections import Counter
+
+# === Tokenization ===
+# Keep hyphenated mission names ("oceansat-3", "insat-3dr") as single terms.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "me", "of", "on", "or", "show", "tell",
+    "that", "the", "this", "to", "was", "what", "when", "where", "which", "who",
+    "why", "with", "you", "about", "please",
+}
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords removed."""
+    return [tok for tok in TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS]
+
+
+# === BM25 Inverted Index ===
+class BM25Index:
+    """
+    Inverted index over chunk texts with Okapi BM25 scoring.
+
+    Built once from the corpus; a query only walks the postings of its own
+    terms, so cost scales with term document frequency, not corpus size.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}   # term -> list of (doc_id, term_freq)
+        self.idf = {}        # term -> idf weight
+        self.doc_len = []    # doc_id -> number of tokens
+        self.avg_len = 0.0
+
+    @classmethod
+    def from_texts(cls, texts, k1=1.5, b=0.75):
+        index = cls(k1=k1, b=b)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text or "")
+            index.doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                index.postings.setdefault(term, []).append((doc_id, tf))
+
+        n_docs = len(index.doc_len)
+        index.avg_len = (sum(index.doc_len) / n_docs) if n_docs else 0.0
+        for term, plist in index.postings.items():
+            df = len(plist)
+            index.idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        return index
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def search(self, query, k=5):
+        """Return up to ``k`` (doc_id, score) pairs, best first."""
+        if not self.doc_len:
+            return []
+
+        scores = {}
+        k1, b, avg_len = self.k1, self.b, self.avg_len or 1.0
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in plist:
+                norm = k1 * (1 - b + b * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,172 @@
+# backend/vector_index.py
+
+import os
+from collections import Counter
+
+import numpy as np
+
+from retriever import tokenize
+from chunk_store import open_chunk_store
+
+# === Paths ===
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMBEDDINGS_PATH = os.path.join(PROJECT_ROOT, "data", "chunk_embeddings.npy")
+MODEL_PATH = os.path.join(PROJECT_ROOT, "data", "embedding_model.npz")
+
+# === Embedding Parameters ===
+EMBEDDING_DIM = 128
+MIN_DF = 1
+BLOCK_ROWS = 4096
+
+
+# === Sparse helpers (CSR without scipy) ===
+def _sparse_dot(indptr, indices, data, dense, n_rows):
+    """Multiply a CSR matrix by a dense matrix, one row block at a time."""
+    out = np.zeros((n_rows, dense.shape[1]), dtype=np.float32)
+    for start in range(0, n_rows, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n_rows)
+        lo, hi = indptr[start], indptr[stop]
+        if lo == hi:
+            continue
+        contrib = data[lo:hi, None] * dense[indices[lo:hi]]
+        starts = indptr[start:stop] - lo
+        nonempty = np.diff(indptr[start:stop + 1]) > 0
+        out[start:stop][nonempty] = np.add.reduceat(contrib, starts[nonempty], axis=0)
+    return out
+
+def _transpose(indptr, indices, data, n_cols):
+    """CSR -> CSR of the transpose (i.e. CSC of the original)."""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    t_indptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_cols), out=t_indptr[1:])
+    return t_indptr, rows[order], data[order]
+
+def _randomized_svd(csr, csc, n_docs, n_terms, k, n_iter=4, oversample=10, seed=0):
+    """Top-k right singular vectors of the TF-IDF matrix (Halko et al.)."""
+    rng = np.random.default_rng(seed)
+    width = min(k + oversample, n_docs, n_terms)
+    y = _sparse_dot(*csr, rng.standard_normal((n_terms, width)).astype(np.float32), n_docs)
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(y)
+        z, _ = np.linalg.qr(_sparse_dot(*csc, q, n_terms))
+        y = _sparse_dot(*csr, z, n_docs)
+    q, _ = np.linalg.qr(y)
+    b = _sparse_dot(*csc, q, n_terms).T
+    _, _, vt = np.linalg.svd(b, full_matrices=False)
+    return vt[:k]
+
+
+# === Offline build ===
+def _weigh(counts, vocab, idf):
+    """Sublinear tf * idf, L2-normalised, as (term_ids, weights)."""
+    ids, weights = [], []
+    for term, tf in counts.items():
+        term_id = vocab.get(term)
+        if term_id is not None:
+            ids.append(term_id)
+            weights.append((1.0 + np.log(tf)) * idf[term_id])
+    weights = np.asarray(weights, dtype=np.float32)
+    norm = np.linalg.norm(weights)
+    return np.asarray(ids, dtype=np.int64), (weights / norm if norm else weights)
+
+def build_embeddings(texts, dim=EMBEDDING_DIM, embeddings_path=EMBEDDINGS_PATH, model_path=MODEL_PATH, corpus_hash=""):
+    """
+    Embed chunk texts with TF-IDF + truncated SVD and write the float32 matrix.
+    ``corpus_hash`` (ChunkStore.content_hash) is saved with the model so a
+    rebuilt corpus is detected at load time.
+    """
+    doc_counts = [Counter(tokenize(text or "")) for text in texts]
+    n_docs = len(doc_counts)
+
+    df = Counter(term for counts in doc_counts for term in counts)
+    terms = sorted(term for term, freq in df.items() if freq >= MIN_DF)
+    vocab = {term: i for i, term in enumerate(terms)}
+    idf = np.array([np.log((1 + n_docs) / (1 + df[t])) + 1.0 for t in terms], dtype=np.float32)
+
+    indptr, indices, data = [0], [], []
+    for counts in doc_counts:
+        ids, weights = _weigh(counts, vocab, idf)
+        indices.append(ids)
+        data.append(weights)
+        indptr.append(indptr[-1] + len(ids))
+    csr = (
+        np.asarray(indptr, dtype=np.int64),
+        np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+        np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+    )
+    csc = _transpose(*csr, len(terms))
+
+    dim = max(1, min(dim, n_docs, len(terms)))
+    components = _randomized_svd(csr, csc, n_docs, len(terms), dim).astype(np.float32)
+
+    projection = np.ascontiguousarray(components.T)
+    doc_vecs = _sparse_dot(*csr, projection, n_docs)
+    norms = np.linalg.norm(doc_vecs, axis=1, keepdims=True)
+    np.save(embeddings_path, doc_vecs / np.where(norms == 0, 1, norms))
+
+    np.savez(model_path, vocab=np.array(terms), idf=idf, projection=projection, corpus_hash=np.array(corpus_hash))
+    return n_docs, dim
+
+
+# === Query-time index ===
+class VectorIndex:
+    """
+    Dense retrieval over a memory-mapped embedding matrix.
+
+    Scoring is a single matrix-vector product plus argpartition; the matrix
+    pages are shared through the OS page cache rather than loaded per process.
+    """
+
+    def __init__(self, embeddings_path=EMBEDDINGS_PATH, model_path=MODEL_PATH):
+        self.embeddings = np.load(embeddings_path, mmap_mode="r")
+        with np.load(model_path) as model:
+            self.vocab = {term: i for i, term in enumerate(model["vocab"].tolist())}
+            self.idf = model["idf"]
+            self.projection = model["projection"]
+            self.corpus_hash = str(model["corpus_hash"]) if "corpus_hash" in model.files else ""
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+    def embed(self, query):
+        ids, weights = _weigh(Counter(tokenize(query)), self.vocab, self.idf)
+        if not len(ids):
+            return None
+        vec = weights @ self.projection[ids]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def search(self, query, k=5):
+        """Return up to ``k`` (doc_id, cosine) pairs, best first."""
+        vec = self.embed(query)
+        n_docs = len(self)
+        if vec is None or n_docs == 0:
+            return []
+        scores = self.embeddings @ vec
+        k = min(k, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+
+def load_vector_index(chunks):
+    """Open the embedding matrix if it exists and was built from exactly this chunk store."""
+    if not (os.path.exists(EMBEDDINGS_PATH) and os.path.exists(MODEL_PATH)):
+        print(f"⚠️ Vector index not found at {EMBEDDINGS_PATH}; run vector_index.py first")
+        return None
+    index = VectorIndex()
+    if len(index) != len(chunks):
+        print(f"⚠️ Vector index has {len(index)} rows but there are {len(chunks)} chunks; rebuild it")
+        return None
+    if index.corpus_hash != chunks.content_hash():
+        print("⚠️ Vector index was built from a different chunk corpus; rebuild it")
+        return None
+    return index
+
+
+if __name__ == "__main__":
+    print("🚀 Embedding chunks (TF-IDF + SVD)...")
+    chunks = open_chunk_store()
+    n_docs, dim = build_embeddings(chunks.texts(), corpus_hash=chunks.content_hash())
+    print(f"✅ Done. {n_docs} x {dim} embeddings saved to {EMBEDDINGS_PATH}")
@@ -0,0 +1,347 @@
+# crawler/async_crawler.py
+
+import os
+import csv
+import time
+import asyncio
+import argparse
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from main_crawler import (
+    target_urls, FILE_DIR, META_FILE, PAGES_FILE, FAILED_FILE_LOG,
+    FILE_EXTENSIONS, should_exclude, normalize_url, extract_html, save_page_text,
+)
+from crawl_state import CrawlState, text_hash, STATE_PATH
+from downloader import FileDownloader, DEFAULT_BUFFER
+
+# === Crawl Parameters ===
+USER_AGENT = "SkyQueryBot/1.0 (+https://github.com/ishansurdi/skyquery-ai)"
+DEFAULT_WORKERS = 8
+DEFAULT_HOST_DELAY = 0.5       # minimum seconds between requests to one host
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 10
+BACKOFF_BASE = 1.0             # 1s, 2s, 4s, ...
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryableStatus(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.retry_after = retry_after
+
+def log_failure(kind, url, error):
+    with open(FAILED_FILE_LOG, "a", encoding="utf-8") as logf:
+        logf.write(f"{kind}: {url} - {error}\n")
+
+def describe(error):
+    # Timeouts stringify to ""
+    return str(error) or type(error).__name__
+
+def is_file_url(url):
+    return any(url.lower().endswith(ext) for ext in FILE_EXTENSIONS)
+
+
+# === Politeness ===
+class HostLimiter:
+    """Spaces requests to each host at least ``delay`` seconds apart; hosts don't block each other."""
+
+    def __init__(self, min_delay=DEFAULT_HOST_DELAY):
+        self.min_delay = min_delay
+        self._next_slot = {}
+
+    async def wait(self, host, delay=None):
+        # Reserve the next slot first (no await in between), then sleep until it
+        now = time.monotonic()
+        start = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = start + max(self.min_delay, delay or 0.0)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class RobotsCache:
+    """One parsed ``robots.txt`` per host, fetched on first use."""
+
+    def __init__(self, session, user_agent=USER_AGENT):
+        self.session = session
+        self.user_agent = user_agent
+        self._parsers = {}
+        self._locks = {}
+
+    async def get(self, url):
+        parsed = urlparse(url)
+        root = f"{parsed.scheme}://{parsed.netloc}"
+        lock = self._locks.setdefault(root, asyncio.Lock())
+        async with lock:
+            if root not in self._parsers:
+                self._parsers[root] = await self._fetch(root)
+        return self._parsers[root]
+
+    async def _fetch(self, root):
+        parser = RobotFileParser(root + "/robots.txt")
+        try:
+            async with self.session.get(root + "/robots.txt") as response:
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif response.status >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse((await response.text(errors="replace")).splitlines())
+        except Exception as e:
+            print(f"  ⚠️ robots.txt unavailable for {root}: {e}")
+            parser.allow_all = True
+        return parser
+
+    async def allowed(self, url):
+        return (await self.get(url)).can_fetch(self.user_agent, url)
+
+    async def crawl_delay(self, url):
+        parser = await self.get(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None:
+            rate = parser.request_rate(self.user_agent)
+            delay = rate.seconds / rate.requests if rate else None
+        return float(delay) if delay else None
+
+
+# === Async crawl engine ===
+class AsyncCrawler:
+    """
+    Same output contract as ``main_crawler.crawl_page`` (pages.jsonl,
+    downloads/, file_metadata.csv, failed_downloads.txt), fetched by a
+    bounded pool of workers over one pooled keep-alive session.
+
+    ``depth`` > 0 also follows same-host page links, like ``get_all_links``.
+
+    With a ``CrawlState``, every URL seen on earlier runs is revisited with
+    a conditional request once the seeds have been expanded; 304s and
+    bodies whose hash hasn't changed are skipped, so a refresh only writes
+    the delta.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, host_delay=DEFAULT_HOST_DELAY, retries=DEFAULT_RETRIES,
+                 timeout=DEFAULT_TIMEOUT, depth=0, user_agent=USER_AGENT, respect_robots=True, state=None,
+                 downloads=4, buffer_size=DEFAULT_BUFFER):
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.depth = depth
+        self.user_agent = user_agent
+        self.respect_robots = respect_robots
+        self.state = state
+        self.downloader = FileDownloader(FILE_DIR, META_FILE, state=state, failed_log=FAILED_FILE_LOG,
+                                         workers=downloads, buffer_size=buffer_size, retries=retries,
+                                         headers={"User-Agent": user_agent})
+        self.limiter = HostLimiter(host_delay)
+        self.visited = set()
+        self.links = set()
+        self.stats = {"pages": 0, "files": 0, "unchanged": 0, "skipped": 0, "failed": 0, "retries": 0}
+
+    # --- Queue ---
+    def _enqueue(self, kind, url, depth=0):
+        url = normalize_url(url)
+        if url in self.visited or should_exclude(url):
+            return
+        if kind == "file" and not os.path.basename(urlparse(url).path):
+            return
+        self.visited.add(url)
+        self._queue.put_nowait((kind, url, depth))
+
+    async def _worker(self):
+        while True:
+            kind, url, depth = await self._queue.get()
+            try:
+                if kind == "file":
+                    await self._download(url)
+                else:
+                    await self._crawl_page(url, depth)
+            finally:
+                self._queue.task_done()
+
+    # --- HTTP with politeness and retries ---
+    async def _request(self, url, handle):
+        """GET ``url`` and pass the open response to ``handle``; retries transient failures."""
+        host = urlparse(url).netloc
+        delay = None
+        if self.respect_robots:
+            if not await self._robots.allowed(url):
+                self.stats["skipped"] += 1
+                print(f"  🚫 Disallowed by robots.txt: {url}")
+                return None
+            delay = await self._robots.crawl_delay(url)
+
+        headers = self.state.conditional_headers(url) if self.state is not None else {}
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait(host, delay)
+            try:
+                async with self._session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        self._unchanged(url, response.status)
+                        return None
+                    if response.status in RETRY_STATUSES:
+                        raise RetryableStatus(response.status, response.headers.get("Retry-After"))
+                    response.raise_for_status()
+                    return await handle(response)
+            except aiohttp.ClientResponseError:
+                raise   # 4xx: retrying won't help
+            except (aiohttp.ClientError, asyncio.TimeoutError, RetryableStatus) as e:
+                if attempt == self.retries:
+                    raise
+                backoff = BACKOFF_BASE * 2 ** attempt
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after and retry_after.isdigit():
+                    backoff = max(backoff, float(retry_after))
+                self.stats["retries"] += 1
+                print(f"  🔁 Retry {attempt + 1}/{self.retries} in {backoff:.1f}s: {url} - {describe(e)}")
+                await asyncio.sleep(backoff)
+
+    # --- State ---
+    def _unchanged(self, url, status=200):
+        self.stats["unchanged"] += 1
+        if self.state is not None:
+            self.state.touch(url, status)
+        print(f"  ♻️ Unchanged: {url}")
+
+    def _record(self, url, kind, response, digest, stored_name=None):
+        if self.state is not None:
+            self.state.record(url, kind, response.status, response.headers.get("ETag"),
+                              response.headers.get("Last-Modified"), digest, stored_name)
+
+    # --- Handlers ---
+    async def _crawl_page(self, url, depth):
+        async def handle(response):
+            content_type = response.headers.get("Content-Type", "")
+            if "text/html" in content_type:
+                content = await response.read()
+                page = extract_html(url, content, response.charset)
+                if page is None:
+                    return
+                digest = text_hash(page.text)
+                if self.state is not None and self.state.is_unchanged(url, digest):
+                    self._unchanged(url, response.status)
+                else:
+                    save_page_text(url, page.text, digest, content_type)
+                    self.stats["pages"] += 1
+                self._record(url, "page", response, digest)
+                self._follow_links(url, page, depth)
+            elif is_file_url(url):
+                return "file"
+            else:
+                self.stats["skipped"] += 1
+                print(f"  ⚠️ Skipping non-HTML: {url}")
+
+        print(f"\n🌐 Visiting: {url}")
+        try:
+            outcome = await self._request(url, handle)
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"  ⚠️ Page error: {url} - {describe(e)}")
+            log_failure("PAGE_ERROR", url, describe(e))
+            return
+        if outcome == "file":
+            # A seed that turned out to be a document: hand it to the resumable downloader
+            await self._download(url)
+
+    def _follow_links(self, url, page, depth):
+        host = urlparse(url).netloc
+        for file_url in page.file_links:
+            self._enqueue("file", file_url)
+        for link in page.links:
+            if urlparse(link).netloc == host and link.startswith("http"):
+                self.links.add(link)
+                if depth < self.depth:
+                    self._enqueue("page", link, depth + 1)
+
+    async def _download(self, url):
+        """Politeness here, then the transfer itself runs on the downloader's thread pool."""
+        print(f"  📥 Downloading: {os.path.basename(urlparse(url).path)}")
+        if self.respect_robots:
+            if not await self._robots.allowed(url):
+                self.stats["skipped"] += 1
+                print(f"  🚫 Disallowed by robots.txt: {url}")
+                return
+            await self.limiter.wait(urlparse(url).netloc, await self._robots.crawl_delay(url))
+        else:
+            await self.limiter.wait(urlparse(url).netloc)
+        result = await asyncio.wrap_future(self.downloader.submit(url))
+        if result is None:
+            self.stats["failed"] += 1
+        elif result.status == "unchanged":
+            self.stats["unchanged"] += 1
+        else:
+            self.stats["files"] += 1
+
+    # --- Entry point ---
+    async def crawl(self, seeds):
+        self._queue = asyncio.Queue()
+        connector = aiohttp.TCPConnector(limit=self.workers, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        started = time.perf_counter()
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": self.user_agent}) as session:
+            self._session = session
+            self._robots = RobotsCache(session, self.user_agent)
+            workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            for url in seeds:
+                self._enqueue("file" if is_file_url(normalize_url(url)) else "page", url)
+            await self._queue.join()
+            if self.state is not None:
+                # Then revisit what earlier runs found that the seeds no longer reach. Only
+                # after the seeds are expanded, so a known page still linked from them is
+                # crawled at its real depth and its new links are followed.
+                for url in self.state.known_urls("page"):
+                    self._enqueue("page", url, self.depth)
+                for url in self.state.known_urls("file"):
+                    self._enqueue("file", url)
+                await self._queue.join()
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        self.downloader.close()
+        self.stats["seconds"] = round(time.perf_counter() - started, 2)
+        return self.stats
+
+
+def save_links(links, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for link in sorted(links):
+            writer.writerow([link])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent crawl of the MOSDAC target pages.")
+    parser.add_argument("urls", nargs="*", help="seed URLs (default: main_crawler.target_urls)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent requests")
+    parser.add_argument("--delay", type=float, default=DEFAULT_HOST_DELAY, help="minimum seconds between requests per host")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries for transient failures")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="connect/read timeout in seconds")
+    parser.add_argument("--depth", type=int, default=0, help="follow same-host page links this many levels")
+    parser.add_argument("--links-out", help="also write every same-host page link found to this CSV")
+    parser.add_argument("--ignore-robots", action="store_true", help="don't fetch or obey robots.txt")
+    parser.add_argument("--state", default=STATE_PATH, help="SQLite crawl state for conditional re-fetches")
+    parser.add_argument("--downloads", type=int, default=4, help="parallel file downloads")
+    parser.add_argument("--buffer-kb", type=int, default=DEFAULT_BUFFER // 1024, help="download read/write buffer")
+    parser.add_argument("--no-state", action="store_true", help="fetch everything unconditionally, keep no state")
+    args = parser.parse_args()
+
+    seeds = args.urls or target_urls
+    state = None if args.no_state else CrawlState(args.state)
+    crawler = AsyncCrawler(workers=args.workers, host_delay=args.delay, retries=args.retries,
+                           timeout=args.timeout, depth=args.depth, respect_robots=not args.ignore_robots,
+                           state=state, downloads=args.downloads, buffer_size=args.buffer_kb * 1024)
+    print(f"🔍 Starting async crawl of {len(seeds)} URLs with {args.workers} workers...")
+    stats = asyncio.run(crawler.crawl(seeds))
+    if args.links_out:
+        save_links(crawler.links, args.links_out)
+        print(f"🔗 {len(crawler.links)} links saved to: {args.links_out}")
+
+    print("\n✅ Crawl completed!")
+    print(f"📊 {stats['pages']} pages, {stats['files']} files, {stats['unchanged']} unchanged, {stats['failed']} failed, "
+          f"{stats['retries']} retries in {stats['seconds']}s")
+    print(f"📝 Page records saved to: {PAGES_FILE}")
+    print(f"📁 Files saved to: {FILE_DIR}")
+    print(f"📄 Metadata saved to: {META_FILE}")
+    print(f"⚠️ Failed downloads logged to: {FAILED_FILE_LOG}")
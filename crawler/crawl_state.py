@@ -0,0 +1,96 @@
+# crawler/crawl_state.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crawl_state.sqlite")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def text_hash(text):
+    """
+    Hash of a page's extracted text with whitespace collapsed. Raw HTML is
+    no use for this: it carries per-request tokens (Drupal form_build_id)
+    that change on every fetch.
+    """
+    return content_hash(" ".join(text.split()).encode("utf-8"))
+
+
+# === Per-URL state ===
+class CrawlState:
+    """
+    SQLite record of every URL fetched: validators for conditional requests
+    (ETag / Last-Modified), the content hash of the last body and, for
+    files, the content-addressed name it was stored under.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                " url TEXT PRIMARY KEY, kind TEXT NOT NULL, status INTEGER,"
+                " etag TEXT, last_modified TEXT, content_hash TEXT, stored_name TEXT,"
+                " fetched_at REAL NOT NULL, changed_at REAL)"
+            )
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM urls WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a URL fetched before, else {}."""
+        row = self.get(url)
+        headers = {}
+        if row and row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row and row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+        return headers
+
+    def is_unchanged(self, url, digest):
+        row = self.get(url)
+        return row is not None and row["content_hash"] == digest
+
+    def record(self, url, kind, status, etag=None, last_modified=None, digest=None, stored_name=None):
+        """Store a 200 response; ``changed_at`` moves only when the content hash changes."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO urls (url, kind, status, etag, last_modified, content_hash, stored_name,"
+                " fetched_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET kind = excluded.kind, status = excluded.status,"
+                " etag = excluded.etag, last_modified = excluded.last_modified,"
+                " changed_at = CASE WHEN urls.content_hash IS excluded.content_hash"
+                "                   THEN urls.changed_at ELSE excluded.changed_at END,"
+                " content_hash = excluded.content_hash,"
+                " stored_name = COALESCE(excluded.stored_name, urls.stored_name),"
+                " fetched_at = excluded.fetched_at",
+                (url, kind, status, etag, last_modified, digest, stored_name, now, now),
+            )
+
+    def touch(self, url, status=304):
+        """A conditional request came back unchanged."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE urls SET status = ?, fetched_at = ? WHERE url = ?", (status, time.time(), url))
+
+    def is_referenced(self, stored_name):
+        """Whether any URL's current file is stored under ``stored_name``."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM urls WHERE stored_name = ? LIMIT 1", (stored_name,)).fetchone() is not None
+
+    def known_urls(self, kind):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM urls WHERE kind = ? ORDER BY url", (kind,))]
+
+    def close(self):
+        self._conn.close()
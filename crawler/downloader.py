@@ -0,0 +1,267 @@
+# crawler/downloader.py
+
+import os
+import csv
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# === Download Parameters ===
+DEFAULT_WORKERS = 4
+DEFAULT_BUFFER = 1024 * 1024      # bytes per read and per write buffer
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 30
+BACKOFF_BASE = 1.0
+
+METADATA_FIELDS = ["filename", "source_url", "file_type", "bytes", "seconds", "throughput_kbps"]
+
+DownloadResult = namedtuple(
+    "DownloadResult", ["url", "stored_name", "digest", "bytes", "seconds", "resumed_from", "status"]
+)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def ensure_metadata(meta_file):
+    """Create file_metadata.csv, or widen an old three-column header in place."""
+    if not os.path.exists(meta_file):
+        with open(meta_file, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(METADATA_FIELDS)
+        return
+    with open(meta_file, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if rows and rows[0] != METADATA_FIELDS:
+        with open(meta_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(METADATA_FIELDS)
+            writer.writerows(rows[1:])
+
+def _expected_digests(headers):
+    """Whole-file checksums the server vouches for: {"sha256": hex}."""
+    expected = {}
+    for header in ("Repr-Digest", "Digest"):
+        for item in headers.get(header, "").split(","):
+            algo, _, value = item.strip().partition("=")
+            if algo.lower() == "sha-256" and value:
+                expected["sha256"] = base64.b64decode(value.strip(":")).hex()
+    return expected
+
+def _expected_body_md5(headers):
+    """Content-MD5 covers only this response's body, i.e. just the range on a 206."""
+    value = headers.get("Content-MD5")
+    return base64.b64decode(value).hex() if value else None
+
+def _file_digests(path, algorithms, buffer_size):
+    hashes = {name: hashlib.new(name) for name in algorithms}
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(buffer_size)
+            if not block:
+                break
+            for h in hashes.values():
+                h.update(block)
+    return {name: h.hexdigest() for name, h in hashes.items()}
+
+
+class FileDownloader:
+    """
+    Bounded pool of download threads sharing one pooled ``requests`` session.
+
+    Each file streams into ``downloads/.partial/<url hash>.part`` with large
+    buffered reads and writes. A sidecar JSON keeps the validators, so an
+    interrupted download resumes with ``Range`` + ``If-Range`` on the next
+    attempt or run. The length and any server-sent checksum are verified
+    before the file is atomically renamed to its content-addressed name.
+    """
+
+    def __init__(self, file_dir, meta_file, state=None, failed_log=None, workers=DEFAULT_WORKERS,
+                 buffer_size=DEFAULT_BUFFER, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT, headers=None):
+        self.file_dir = file_dir
+        self.partial_dir = os.path.join(file_dir, ".partial")
+        self.meta_file = meta_file
+        self.state = state
+        self.failed_log = failed_log
+        self.buffer_size = buffer_size
+        self.retries = retries
+        self.timeout = timeout
+        os.makedirs(self.partial_dir, exist_ok=True)
+        ensure_metadata(meta_file)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Byte counts must match Content-Length / Content-Range, so no transfer compression
+        self.session.headers.update({"Accept-Encoding": "identity", **(headers or {})})
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download")
+        self._lock = threading.Lock()
+        self._futures = []
+        self.stats = {"files": 0, "unchanged": 0, "failed": 0, "resumed": 0, "bytes": 0, "seconds": 0.0}
+
+    # --- Public API ---
+    def submit(self, url):
+        future = self._pool.submit(self.download, url)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def wait(self):
+        """Block until every submitted download has finished."""
+        while True:
+            with self._lock:
+                futures, self._futures = self._futures, []
+            if not futures:
+                return
+            for future in futures:
+                future.result()
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+        self.session.close()
+
+    def download(self, url):
+        """Download with retries; failures are logged and return None."""
+        for attempt in range(self.retries + 1):
+            try:
+                return self._attempt(url)
+            except (requests.RequestException, DownloadError, OSError) as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if attempt == self.retries or (status is not None and 400 <= status < 500 and status != 429):
+                    self._count("failed")
+                    print(f"  ❌ File fail: {url} - {e}")
+                    if self.failed_log:
+                        with self._lock, open(self.failed_log, "a", encoding="utf-8") as logf:
+                            logf.write(f"FILE_ERROR: {url} - {e}\n")
+                    return None
+                backoff = BACKOFF_BASE * 2 ** attempt
+                print(f"  🔁 Retry {attempt + 1}/{self.retries} in {backoff:.1f}s: {url} - {e}")
+                time.sleep(backoff)
+
+    # --- One attempt ---
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.partial_dir, key + ".part"), os.path.join(self.partial_dir, key + ".json")
+
+    def _attempt(self, url):
+        part, sidecar = self._paths(url)
+        resume = {}
+        if os.path.exists(part) and os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                resume = json.load(f)
+        offset = os.path.getsize(part) if resume.get("validator") else 0
+
+        headers = {}
+        if offset:
+            headers = {"Range": f"bytes={offset}-", "If-Range": resume["validator"]}
+        elif self.state is not None:
+            headers = self.state.conditional_headers(url)
+
+        started = time.perf_counter()
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as r:
+            if r.status_code == 304:
+                self.state.touch(url)
+                self._count("unchanged")
+                print(f"  ♻️ Unchanged: {url}")
+                return DownloadResult(url, None, None, 0, 0.0, 0, "unchanged")
+            if r.status_code == 416:
+                os.remove(part)   # partial no longer matches the resource; start over
+                os.remove(sidecar)
+                raise DownloadError("range not satisfiable, restarting download")
+            r.raise_for_status()
+
+            if r.status_code == 206 and offset:
+                total = int(r.headers.get("Content-Range", "*/*").rsplit("/", 1)[1].replace("*", "0")) or None
+                mode = "ab"
+                self._count("resumed")
+                print(f"  ⏯️ Resuming at {offset} bytes: {url}")
+            else:
+                # 200: new download, or the file changed since the partial was written
+                offset = 0
+                total = int(r.headers["Content-Length"]) if "Content-Length" in r.headers else None
+                mode = "wb"
+                validator = r.headers.get("ETag") or r.headers.get("Last-Modified")
+                with open(sidecar, "w", encoding="utf-8") as f:
+                    json.dump({"url": url, "validator": validator, "total": total}, f)
+
+            received = 0
+            body_md5 = _expected_body_md5(r.headers)
+            body_hash = hashlib.md5() if body_md5 else None
+            with open(part, mode, buffering=self.buffer_size) as f:
+                for block in r.iter_content(self.buffer_size):
+                    f.write(block)
+                    received += len(block)
+                    if body_hash is not None:
+                        body_hash.update(block)
+            seconds = time.perf_counter() - started
+            size = os.path.getsize(part)
+            if total is not None and size != total:
+                raise DownloadError(f"incomplete: {size}/{total} bytes")   # partial kept for resume
+
+            if body_hash is not None and body_hash.hexdigest() != body_md5:
+                os.remove(part)
+                os.remove(sidecar)
+                raise DownloadError(f"md5 mismatch: got {body_hash.hexdigest()}, expected {body_md5}")
+            expected = _expected_digests(r.headers)
+            digests = _file_digests(part, {"sha256", *expected}, self.buffer_size)
+            for algo, value in expected.items():
+                if digests[algo] != value:
+                    os.remove(part)
+                    os.remove(sidecar)
+                    raise DownloadError(f"{algo} mismatch: got {digests[algo]}, expected {value}")
+
+            result = self._commit(url, r, part, digests["sha256"], size, seconds, offset)
+        os.remove(sidecar)
+        return result
+
+    def _commit(self, url, response, part, digest, size, seconds, offset):
+        ext = os.path.splitext(os.path.basename(urlparse(url).path))[1].lower()
+        stored_name = digest + ext
+        dest = os.path.join(self.file_dir, stored_name)
+        previous = self.state.get(url) if self.state is not None else None
+        # Blobs are shared by content, so placing, recording and pruning happen under one lock
+        with self._lock:
+            if os.path.exists(dest):
+                os.remove(part)   # identical content already stored
+            else:
+                os.replace(part, dest)
+            if self.state is not None:
+                self.state.record(url, "file", response.status_code, response.headers.get("ETag"),
+                                  response.headers.get("Last-Modified"), digest, stored_name)
+            superseded = previous and previous["stored_name"]
+            if superseded and superseded != stored_name and not self.state.is_referenced(superseded):
+                old = os.path.join(self.file_dir, superseded)
+                if os.path.exists(old):
+                    os.remove(old)   # the URL's old version must not be parsed again
+                    print(f"  🗑️ Removed superseded {superseded[:12]}…: {url}")
+
+        unchanged = previous is not None and previous["content_hash"] == digest
+        if unchanged:
+            self._count("unchanged")
+            print(f"  ♻️ Unchanged: {url}")
+            return DownloadResult(url, stored_name, digest, size, seconds, offset, "unchanged")
+
+        kbps = (size - offset) / 1024 / seconds if seconds > 0 else 0.0
+        with self._lock:
+            self.stats["files"] += 1
+            self.stats["bytes"] += size - offset
+            self.stats["seconds"] += seconds
+            with open(self.meta_file, "a", newline="", encoding="utf-8") as csvfile:
+                csv.writer(csvfile).writerow([stored_name, url, ext, size, round(seconds, 3), round(kbps, 1)])
+        print(f"  ✅ Saved {stored_name[:12]}…{ext} ({size / 1024:.0f} KB at {kbps:.0f} KB/s)")
+        return DownloadResult(url, stored_name, digest, size, seconds, offset, "downloaded")
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
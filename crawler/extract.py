@@ -0,0 +1,87 @@
+# crawler/extract.py
+
+from collections import namedtuple
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+
+import lxml.html
+from lxml import etree
+
+# Subtrees whose text never reaches the page text (BeautifulSoup's get_text skips them too)
+SKIP_TAGS = {"script", "style", "template"}
+
+PageExtract = namedtuple("PageExtract", ["text", "links", "file_links"])
+
+
+def normalize_url(url):
+    parsed = urlparse(url)
+    clean_query = urlencode(sorted(parse_qsl(parsed.query)))
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', clean_query, ''))
+
+def clean_segment(segment):
+    """Replace non-printable characters with spaces; most segments take the C fast path."""
+    if segment.isprintable():
+        return segment
+    return "".join(c if c.isprintable() else " " for c in segment)
+
+def _parse(content, encoding=None):
+    if isinstance(content, bytes):
+        try:
+            content = content.decode(encoding or "utf-8")
+        except (UnicodeDecodeError, LookupError):
+            pass   # let libxml2 sniff <meta charset>, falling back to Latin-1
+    return lxml.html.document_fromstring(content)
+
+def extract_page(url, content, file_extensions=(), exclude=None, encoding=None):
+    """
+    Parse ``content`` once and walk the tree once, collecting:
+
+    - ``text``: stripped text nodes joined by spaces, non-printables blanked
+      (what ``get_text(separator="\\n", strip=True)`` plus the printable
+      filter used to produce)
+    - ``links``: normalized absolute page links, in document order
+    - ``file_links``: the links ending in one of ``file_extensions``
+
+    URLs for which ``exclude(url)`` is true are dropped.
+    """
+    root = _parse(content, encoding)
+    segments = []
+    links, file_links, seen = [], [], set()
+    skipping = 0
+
+    def add(text):
+        if text:
+            text = text.strip()
+            if text:
+                segments.append(clean_segment(text))
+
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event in ("comment", "pi"):
+            # Single event, no end: the comment itself is dropped, its tail is text
+            if not skipping:
+                add(el.tail)
+            continue
+        tag = el.tag
+        if event == "start":
+            if tag in SKIP_TAGS:
+                skipping += 1
+            elif not skipping:
+                add(el.text)
+                if tag == "a":
+                    href = el.get("href")
+                    if href is None:
+                        continue
+                    full_url = normalize_url(urljoin(url, href.strip()))
+                    if full_url in seen or (exclude is not None and exclude(full_url)):
+                        continue
+                    seen.add(full_url)
+                    if any(full_url.lower().endswith(ext) for ext in file_extensions):
+                        file_links.append(full_url)
+                    else:
+                        links.append(full_url)
+        else:
+            if tag in SKIP_TAGS:
+                skipping -= 1
+            if not skipping:
+                add(el.tail)
+
+    return PageExtract(" ".join(segments), links, file_links)
@@ -1,8 +1,11 @@
 import os
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
-import csv
+from urllib.parse import urlparse
+
+from extract import extract_page, normalize_url  # single lxml pass: text + links
+from crawl_state import CrawlState, text_hash
+from downloader import FileDownloader
+from page_records import append_page_record, PAGES_FILE
 
 # List of only selected URLs to crawl
 target_urls = [
@@ -75,70 +78,63 @@ target_urls = [
     "https://www.mosdac.gov.in/oceanic-eddies-detection"
 ]
 
-BASE_DIR = r"C:\Users\Admin\Desktop\Restart\Hack\skyquery-ai\crawler"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FILE_DIR = os.path.join(BASE_DIR, "downloads")
 META_FILE = os.path.join(BASE_DIR, "file_metadata.csv")
-ALL_PAGES_FILE = os.path.join(BASE_DIR, "all_pages.txt")
 FAILED_FILE_LOG = os.path.join(BASE_DIR, "failed_downloads.txt")
 
 VISITED = set()
-DOWNLOADED_FILES = set()
+DOWNLOADED_FILES = set()   # file URLs handled this run
+STATE = None               # CrawlState when run as a script: conditional re-fetches across runs
+DOWNLOADER = None          # FileDownloader pool, created on first use
 
 os.makedirs(FILE_DIR, exist_ok=True)
 
 FILE_EXTENSIONS = ['.pdf', '.docx', '.xlsx', '.zip', '.jpg', '.png', '.jpeg', '.tif']
 EXCLUDE_PATTERNS = ["/signup", "/auth/", "/sso/", "redirect_uri", "logout", "language=", "openid-connect"]
 
-if not os.path.exists(META_FILE):
-    with open(META_FILE, "w", newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["filename", "source_url", "file_type"])
-
 def should_exclude(url):
     return any(pattern in url for pattern in EXCLUDE_PATTERNS)
 
-def normalize_url(url):
-    parsed = urlparse(url)
-    clean_query = urlencode(sorted(parse_qsl(parsed.query)))
-    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', clean_query, ''))
-
-def save_page_text(url, content):
+def extract_html(url, content, encoding=None):
+    """Parse a page once; returns its PageExtract, or None (logged) if it can't be parsed."""
     try:
-        soup = BeautifulSoup(content, 'html.parser')
-        text = soup.get_text(separator="\n", strip=True)
-        clean = ''.join(c if c.isprintable() else ' ' for c in text)
-        with open(ALL_PAGES_FILE, "a", encoding="utf-8") as f:
-            f.write("\n" + "="*60 + "\n")
-            f.write(f"🌐 URL: {url}\n")
-            f.write("="*60 + "\n\n")
-            f.write(clean + "\n")
-        print(f"  📝 Saved text: {url}")
+        return extract_page(url, content, FILE_EXTENSIONS, should_exclude, encoding)
     except Exception as e:
         print(f"  ❌ Text parse fail: {url} - {e}")
         with open(FAILED_FILE_LOG, "a", encoding="utf-8") as logf:
             logf.write(f"TEXT_ERROR: {url} - {e}\n")
+        return None
+
+def save_page_text(url, text, digest, content_type):
+    append_page_record(url, text, digest, content_type)
+    print(f"  📝 Saved text: {url}")
+
+def conditional_headers(url):
+    return STATE.conditional_headers(url) if STATE is not None else {}
+
+def record_state(url, kind, response, digest, stored_name=None):
+    if STATE is not None:
+        STATE.record(url, kind, response.status_code, response.headers.get("ETag"),
+                     response.headers.get("Last-Modified"), digest, stored_name)
+
+def is_unchanged(url, digest):
+    return STATE is not None and STATE.is_unchanged(url, digest)
+
+def get_downloader():
+    global DOWNLOADER
+    if DOWNLOADER is None:
+        DOWNLOADER = FileDownloader(FILE_DIR, META_FILE, state=STATE, failed_log=FAILED_FILE_LOG)
+    return DOWNLOADER
 
 def save_file(url):
-    try:
-        filename = os.path.basename(urlparse(url).path)
-        if not filename or filename in DOWNLOADED_FILES:
-            return
-        file_ext = os.path.splitext(filename)[1].lower()
-        filepath = os.path.join(FILE_DIR, filename)
-        print(f"  📥 Downloading: {filename}")
-        with requests.get(url, stream=True, timeout=10) as r:
-            r.raise_for_status()
-            with open(filepath, 'wb') as f:
-                for chunk in r.iter_content(1024):
-                    f.write(chunk)
-        with open(META_FILE, "a", newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow([filename, url, file_ext])
-        DOWNLOADED_FILES.add(filename)
-    except Exception as e:
-        print(f"  ❌ File fail: {url} - {e}")
-        with open(FAILED_FILE_LOG, "a", encoding="utf-8") as logf:
-            logf.write(f"FILE_ERROR: {url} - {e}\n")
+    """Queue a download on the shared pool; call get_downloader().wait() to finish them."""
+    filename = os.path.basename(urlparse(url).path)
+    if not filename or url in DOWNLOADED_FILES:
+        return
+    DOWNLOADED_FILES.add(url)
+    print(f"  📥 Downloading: {filename}")
+    get_downloader().submit(url)
 
 def crawl_page(url):
     url = normalize_url(url)
@@ -147,19 +143,26 @@ def crawl_page(url):
     VISITED.add(url)
     try:
         print(f"\n🌐 Visiting: {url}")
-        response = requests.get(url, timeout=10)
+        response = requests.get(url, timeout=10, headers=conditional_headers(url))
+        if response.status_code == 304:
+            STATE.touch(url)
+            print(f"  ♻️ Unchanged: {url}")
+            return
         response.raise_for_status()
         content_type = response.headers.get('Content-Type', '')
         if 'text/html' in content_type:
-            save_page_text(url, response.content)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                full_url = normalize_url(urljoin(url, href))
-                if should_exclude(full_url):
-                    continue
-                if any(full_url.lower().endswith(ext) for ext in FILE_EXTENSIONS):
-                    save_file(full_url)
+            # Only trust an explicit header charset (requests otherwise assumes ISO-8859-1)
+            encoding = response.encoding if 'charset' in content_type.lower() else None
+            page = extract_html(url, response.content, encoding)
+            if page is not None:
+                digest = text_hash(page.text)
+                if is_unchanged(url, digest):
+                    print(f"  ♻️ Unchanged: {url}")
+                else:
+                    save_page_text(url, page.text, digest, content_type)
+                record_state(url, "page", response, digest)
+                for file_url in page.file_links:
+                    save_file(file_url)
         elif any(url.lower().endswith(ext) for ext in FILE_EXTENSIONS):
             save_file(url)
         else:
@@ -170,11 +173,16 @@ def crawl_page(url):
             logf.write(f"PAGE_ERROR: {url} - {e}\n")
 
 if __name__ == "__main__":
+    STATE = CrawlState()
     print(f"🔍 Starting crawl of {len(target_urls)} URLs...")
     for url in target_urls:
         crawl_page(url)
+    # Files found on earlier runs are rechecked even if no page links them this time
+    for url in STATE.known_urls("file"):
+        save_file(url)
+    get_downloader().close()
     print("\n✅ Crawl completed!")
-    print(f"📝 Text pages saved to: {ALL_PAGES_FILE}")
+    print(f"📝 Page records saved to: {PAGES_FILE}")
     print(f"📁 Files saved to: {FILE_DIR}")
     print(f"📄 Metadata saved to: {META_FILE}")
     print(f"⚠️ Failed downloads logged to: {FAILED_FILE_LOG}")
@@ -0,0 +1,61 @@
+# crawler/page_records.py
+
+import os
+import json
+import time
+
+PAGES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages.jsonl")
+RECORD_FIELDS = ("url", "fetched_at", "content_hash", "content_type", "text")
+
+
+def append_page_record(url, text, content_hash, content_type, fetched_at=None, path=PAGES_FILE):
+    """
+    Append one page as a single JSON line. Newlines inside the text are
+    escaped, so no page content can break the record boundaries.
+    """
+    record = {
+        "url": url,
+        "fetched_at": fetched_at or time.time(),
+        "content_hash": content_hash,
+        "content_type": content_type,
+        "text": text,
+    }
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+def iter_page_records(path=PAGES_FILE, follow=False, idle_timeout=30.0, poll_interval=0.5, start=0, offsets=False):
+    """
+    Yield page records one at a time; memory stays flat whatever the file size.
+
+    A last line without its newline is a record still being written. By
+    default reading stops there. With ``follow`` the reader waits for it
+    and for new records, like ``tail -f``, until nothing has arrived for
+    ``idle_timeout`` seconds. That lets chunking run alongside a crawl.
+
+    ``start`` is the byte offset to begin at. With ``offsets`` each item is
+    ``(end, record)``, ``end`` being the offset just past that record.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        pending = b""
+        idle_since = time.monotonic()
+        while True:
+            line = f.readline()
+            if line:
+                pending += line
+                if not pending.endswith(b"\n"):
+                    continue
+                try:
+                    record = json.loads(pending)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    print(f"[!] Skipped malformed page record: {e}")
+                else:
+                    yield (f.tell(), record) if offsets else record
+                pending = b""
+                idle_since = time.monotonic()
+            elif not follow or time.monotonic() - idle_since > idle_timeout:
+                return
+            else:
+                time.sleep(poll_interval)
@@ -1,8 +1,6 @@
 import os
-import json
+import sys
 import re
-import spacy
-from spacy.cli import download
 
 import requests
 import streamlit as st
@@ -12,32 +10,45 @@ from pathlib import Path
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
-# === Load spaCy ===
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    raise RuntimeError(
-        "The spaCy model 'en_core_web_sm' is not installed. "
-        "Add it to requirements.txt as a wheel URL for Streamlit Cloud."
-    )
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from retriever import BM25Index
+from chunk_store import open_chunk_store
+from context_builder import build_context
+from llm_gateway import get_gateway
+from kg_query import search_entities, format_relations
+from kg_snapshot import load_snapshot
+from kg_ledger import IngestionLedger
+from kg_traversal import KGTraverser, neo4j_fetcher, snapshot_fetcher
+from nlp_engine import detect_intent  # keyword rules first, spaCy parse only when needed
+from geo_module.geo_utils import resolve_geo, format_geo
 
 # === Load secrets ===
 load_dotenv()
-GEMINI_API_KEY = st.secrets.get("GEMINI_API_KEY", os.getenv("GEMINI_API_KEY"))
 NEO4J_URI = st.secrets.get("NEO4J_URI", os.getenv("NEO4J_URI"))
 NEO4J_USER = st.secrets.get("NEO4J_USERNAME", os.getenv("NEO4J_USERNAME"))
 NEO4J_PASS = st.secrets.get("NEO4J_PASSWORD", os.getenv("NEO4J_PASSWORD"))
+KG_BACKEND = st.secrets.get("KG_BACKEND", os.getenv("KG_BACKEND", "neo4j")).lower()
 
-# === Neo4j Setup ===
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+# === Neo4j Setup (or the local snapshot, with no connection) ===
+@st.cache_resource
+def load_kg():
+    if KG_BACKEND == "snapshot":
+        snapshot = load_snapshot()
+        traverser = KGTraverser(snapshot_fetcher(snapshot), lambda: snapshot.version) if snapshot else None
+        return None, snapshot, traverser
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+    return driver, None, KGTraverser(neo4j_fetcher(driver), IngestionLedger().build_version)
 
-# === Load chunks ===
-CHUNKS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "chunks.json")
-try:
-    with open(CHUNKS_PATH, "r", encoding="utf-8") as f:
-        chunks = json.load(f)
-except:
-    chunks = []
+driver, snapshot, traverser = load_kg()
+
+# === Load chunks + BM25 index (once per server process) ===
+@st.cache_resource
+def load_retriever():
+    chunks = open_chunk_store()
+    return chunks, BM25Index.from_texts(chunks.texts())
+
+chunks, index = load_retriever()
 
 # === Utility ===
 def sanitize_relation(verb):
@@ -46,63 +57,38 @@ def sanitize_relation(verb):
 
 # === Query Neo4j ===
 def query_neo4j(question):
-    keywords = [word for word in question.split() if len(word) > 3]
-    with driver.session() as session:
-        for kw in keywords:
-            result = session.run("""
-                MATCH (a:Entity)-[r]->(b:Entity)
-                WHERE toLower(a.name) CONTAINS toLower($kw)
-                RETURN a.name, type(r), b.name LIMIT 1
-            """, kw=kw)
-            record = result.single()
-            if record:
-                return f"({record['a.name']}) -[{record['type(r)']}] -> ({record['b.name']})"
-    return ""
-
-# === RAG Query ===
-def query_rag(text):
-    import google.generativeai as genai
-    genai.configure(api_key=GEMINI_API_KEY)
-
-    matched_chunk = None
-    query_words = set(text.lower().split())
-    max_match = 0
-    for chunk in chunks:
-        content = chunk.get("text") or chunk.get("chunk") or ""
-        score = sum(1 for word in query_words if word in content.lower())
-        if score > max_match:
-            max_match = score
-            matched_chunk = content
-
-    if not matched_chunk:
-        return "⚠️ No relevant content found."
+    if traverser is None:
+        return ""
+    try:
+        seeds = snapshot.search_entities(question) if snapshot else search_entities(driver, question)
+        return format_relations(traverser.traverse(seeds))
+    except Exception as e:
+        print(f"⚠️ KG lookup failed: {e}")
+        return ""
+
+# === RAG Query (streamed: yields text as Gemini generates it) ===
+def query_rag_stream(text):
+    hits = index.search(text, k=5)
+    if not hits:
+        yield "⚠️ No relevant content found."
+        return
+    context, _chunk_ids = build_context(hits, chunks)
 
     prompt = f"""
 You are a helpful assistant for MOSDAC satellite data.
 Use the context below to answer the question:
 
 Context:
-{matched_chunk}
+{context}
 
 Q: {text}
 A:
 """
 
     try:
-        model = genai.GenerativeModel(model_name="models/gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        yield from get_gateway().stream(prompt)
     except Exception as e:
-        return f"❌ Gemini error: {e}"
-
-# === Intent Detection ===
-def detect_intent(text):
-    lowered = text.lower()
-    if any(w in lowered for w in ["map", "location", "where"]):
-        return "geo"
-    elif any(t.dep_ == "nsubj" for t in nlp(text)):
-        return "kg"
-    return "rag"
+        yield f"❌ Gemini error: {e}"
 
 # === Streamlit UI ===
 st.set_page_config(page_title="SkyQuery AI", page_icon="🚀", layout="wide")
@@ -132,19 +118,28 @@ if query := st.chat_input("Ask me about Oceansat-3, INSAT, weather, etc..."):
         st.markdown(query)
 
     intent = detect_intent(query)
-    if intent == "kg":
-        response = query_neo4j(query)
-    elif intent == "rag":
-        response = query_rag(query)
-    else:
-        response = "🌍 Here's a sample location for visualization"
-
-    st.session_state.messages.append({"role": "assistant", "content": response})
     with st.chat_message("assistant"):
-        st.markdown(response)
-
         if intent == "geo":
-            lat, lon = 23.0, 72.0  # default location (e.g., Gujarat)
-            m = folium.Map(location=[lat, lon], zoom_start=6)
-            folium.Marker([lat, lon], popup=query).add_to(m)
+            geo = resolve_geo(query)  # local gazetteer lookup
+            response = format_geo(geo, query)
+            st.markdown(response)
+            m = folium.Map(location=geo["center"], zoom_start=5)
+            for place in geo["places"]:
+                south, west, north, east = place["bbox"]
+                folium.Rectangle([[south, west], [north, east]], tooltip=place["name"], fill=False).add_to(m)
+                folium.Marker([place["lat"], place["lon"]], popup=place["name"]).add_to(m)
+            for place in geo["related"]:
+                folium.CircleMarker([place["lat"], place["lon"]], radius=5, tooltip=place["name"]).add_to(m)
+            if geo["point"] is not None:
+                folium.Marker(geo["point"], popup=query, icon=folium.Icon(color="red")).add_to(m)
+            m.fit_bounds(geo["bbox"])
             st_folium(m, height=400)
+        else:
+            response = query_neo4j(query) if intent == "kg" else ""
+            if response:
+                st.markdown(response)
+            else:
+                # RAG (or a KG miss): render tokens as they arrive
+                response = st.write_stream(query_rag_stream(query))
+
+    st.session_state.messages.append({"role": "assistant", "content": response})
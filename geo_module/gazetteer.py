@@ -0,0 +1,188 @@
+# geo_module/gazetteer.py
+
+import os
+import re
+import json
+import math
+from collections import deque
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.json")
+
+GRID_CELL_DEG = 1.0
+EARTH_RADIUS_KM = 6371.0
+
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase, with every run of non-alphanumerics collapsed to one space."""
+    return NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def bbox_contains(bbox, lat, lon):
+    south, west, north, east = bbox
+    return south <= lat <= north and west <= lon <= east
+
+
+# === Place-name matcher ===
+class PlaceMatcher:
+    """
+    Aho-Corasick automaton over normalized place names and aliases. Names
+    are padded with spaces, so they match whole words only. A question is
+    scanned once, character by character, whatever the number of names.
+    """
+
+    def __init__(self, names):
+        # names: normalized name -> place index
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]   # state -> [(pattern length, place index)]
+        for name, index in names.items():
+            pattern = f" {name} "
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(pattern), index))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Place indices named in ``text``, leftmost-longest, without overlaps, in order."""
+        padded = f" {normalize(text)} "
+        hits = []
+        state = 0
+        for i, ch in enumerate(padded):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, index in self._out[state]:
+                # Inner span: neighbouring names share their padding space
+                hits.append((i - length + 2, i, index))
+
+        found, end = [], -1
+        for start, stop, index in sorted(hits, key=lambda h: (h[0], h[0] - h[1])):
+            if start >= end:
+                found.append(index)
+                end = stop
+        return list(dict.fromkeys(found))
+
+
+# === Spatial index ===
+class GridIndex:
+    """Fixed-size lat/lon grid; each place is listed in every cell its bounding box touches."""
+
+    def __init__(self, bboxes, cell=GRID_CELL_DEG):
+        self.cell = cell
+        self.bboxes = bboxes
+        self.cells = {}
+        for index, bbox in enumerate(bboxes):
+            for key in self._keys(*bbox):
+                self.cells.setdefault(key, []).append(index)
+
+    def _keys(self, south, west, north, east):
+        c = self.cell
+        for i in range(math.floor(south / c), math.floor(north / c) + 1):
+            for j in range(math.floor(west / c), math.floor(east / c) + 1):
+                yield i, j
+
+    def intersecting(self, south, west, north, east):
+        """Places whose bounding box overlaps the query box."""
+        found = set()
+        for key in self._keys(south, west, north, east):
+            for index in self.cells.get(key, ()):
+                s, w, n, e = self.bboxes[index]
+                if s <= north and n >= south and w <= east and e >= west:
+                    found.add(index)
+        return found
+
+    def containing(self, lat, lon):
+        """Places whose bounding box contains the point."""
+        key = (math.floor(lat / self.cell), math.floor(lon / self.cell))
+        return [i for i in self.cells.get(key, ()) if bbox_contains(self.bboxes[i], lat, lon)]
+
+
+# === Gazetteer ===
+class Gazetteer:
+    """
+    Offline gazetteer of Indian states, union territories, districts and
+    MOSDAC regions of interest. Regions are bounding boxes, so
+    point-in-region means point-in-box.
+    """
+
+    def __init__(self, places):
+        self.places = places
+        names = {}
+        for index, place in enumerate(places):
+            for name in [place["name"], *place.get("aliases", ())]:
+                names.setdefault(normalize(name), index)
+        self.matcher = PlaceMatcher(names)
+        self.index = GridIndex([place["bbox"] for place in places])
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def by_name(self, name):
+        found = self.matcher.find(name)
+        return self.places[found[0]] if found else None
+
+    def match(self, text):
+        """Places named in ``text``, in the order they appear."""
+        return [self.places[i] for i in self.matcher.find(text)]
+
+    def containing(self, lat, lon, kinds=None):
+        """Places containing the point, smallest first."""
+        hits = [self.places[i] for i in self.index.containing(lat, lon)]
+        if kinds:
+            hits = [p for p in hits if p["kind"] in kinds]
+        return sorted(hits, key=bbox_area)
+
+    def within(self, bbox, kinds=None):
+        """Places whose centre lies inside ``bbox``."""
+        hits = (self.places[i] for i in self.index.intersecting(*bbox))
+        return sorted(
+            (p for p in hits if (not kinds or p["kind"] in kinds) and bbox_contains(bbox, p["lat"], p["lon"])),
+            key=lambda p: p["name"],
+        )
+
+    def near(self, lat, lon, radius_km, kinds=None, limit=5):
+        """(distance_km, place) for places whose centre is within ``radius_km`` or whose box holds the point."""
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        results = []
+        for i in self.index.intersecting(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+            place = self.places[i]
+            if kinds and place["kind"] not in kinds:
+                continue
+            distance = haversine_km(lat, lon, place["lat"], place["lon"])
+            if distance <= radius_km or bbox_contains(place["bbox"], lat, lon):
+                results.append((distance, place))
+        results.sort(key=lambda r: r[0])
+        return results[:limit]
+
+
+def bbox_area(place):
+    south, west, north, east = place["bbox"]
+    return (north - south) * (east - west)
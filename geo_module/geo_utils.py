@@ -1,5 +1,199 @@
 # geo_module/geo_utils.py
 
+import re
+from functools import lru_cache
+
+from geo_module.gazetteer import Gazetteer
+
+# === Geo Parameters ===
+NEAR_RADIUS_KM = 150     # first search radius for "near <point>"; doubled while nothing is found
+NEAR_EXPANSIONS = 3
+NEAR_LIMIT = 5
+INDIA = (6.5, 68.0, 37.1, 97.4)   # map extent when nothing in the question resolves
+
+# "20N 85E", "20.5° N, 85.25° E", "12S 80E"
+HEMISPHERE_RE = re.compile(
+    r"(\d{1,2}(?:\.\d+)?)\s*°?\s*([NS])\b[\s,;/]*(?:and\s+)?(\d{1,3}(?:\.\d+)?)\s*°?\s*([EW])\b",
+    re.IGNORECASE,
+)
+# "lat 20.1 lon 85", "latitude: 20, longitude: 85"
+LATLON_RE = re.compile(
+    r"\blat(?:itude)?\s*[:=]?\s*(-?\d{1,2}(?:\.\d+)?)[\s,;]*(?:and\s+)?(?:lon|lng|long)(?:itude)?\s*[:=]?\s*(-?\d{1,3}(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+# "(20.5, 85.3)"
+PAIR_RE = re.compile(r"\(\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*\)")
+
+# Words asking for a kind of place: "which districts are near ...", "states in the Himalayas"
+KIND_WORDS = {
+    "district": "district", "districts": "district",
+    "state": "state", "states": "state", "union territory": "union territory",
+    "union territories": "union territory",
+    "region": "region", "regions": "region",
+}
+PLURAL_KIND_WORDS = {"districts", "states", "union territories", "regions"}
+KIND_RE = re.compile(r"\b(%s)\b" % "|".join(sorted(KIND_WORDS, key=len, reverse=True)), re.IGNORECASE)
+LANDMARK_KINDS = ("state", "union territory", "district", "site")
+NEARBY_KINDS = ("district", "site")   # "near <point>" without a kind word
+# Coarse to fine; "districts in Odisha" lists a finer kind inside a coarser place
+KIND_RANK = {"country": 0, "region": 1, "state": 2, "union territory": 2, "district": 3, "site": 4}
+NEAR_RE = re.compile(r"\b(?:near|nearby|around|close to|adjacent|neighbou?r\w*|surrounding)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer():
+    """Loaded once per process."""
+    return Gazetteer.load()
+
+def _valid(lat, lon):
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+def parse_point(text):
+    """(lat, lon) from the first valid coordinate pair in ``text``, or None."""
+    match = HEMISPHERE_RE.search(text)
+    if match:
+        lat, ns, lon, ew = match.groups()
+        lat, lon = float(lat), float(lon)
+        lat, lon = (-lat if ns.upper() == "S" else lat), (-lon if ew.upper() == "W" else lon)
+        if _valid(lat, lon):
+            return lat, lon
+    for pattern in (LATLON_RE, PAIR_RE):
+        match = pattern.search(text)
+        if match:
+            lat, lon = float(match.group(1)), float(match.group(2))
+            if _valid(lat, lon):
+                return lat, lon
+    return None
+
+def requested_kind(text, places=()):
+    """
+    The kind of place the question asks for. A plural ("districts") names
+    the target. Otherwise a singular that merely describes a named place
+    ("the state of Odisha") is passed over.
+    """
+    words = [m.group(1).lower() for m in KIND_RE.finditer(text)]
+    if not words:
+        return None
+    plurals = [w for w in words if w in PLURAL_KIND_WORDS]
+    if plurals:
+        return KIND_WORDS[plurals[0]]
+    named = {p["kind"] for p in places}
+    targets = [KIND_WORDS[w] for w in words if KIND_WORDS[w] not in named]
+    return targets[0] if targets else KIND_WORDS[words[0]]
+
+def _summary(place, distance_km=None):
+    item = {"name": place["name"], "kind": place["kind"], "lat": place["lat"], "lon": place["lon"], "bbox": place["bbox"]}
+    if "state" in place:
+        item["state"] = place["state"]
+    if distance_km is not None:
+        item["distance_km"] = round(distance_km, 1)
+    return item
+
+def _near(gazetteer, lat, lon, kinds, exclude=None):
+    radius = NEAR_RADIUS_KM
+    for _ in range(NEAR_EXPANSIONS + 1):
+        hits = [(d, p) for d, p in gazetteer.near(lat, lon, radius, kinds=kinds, limit=NEAR_LIMIT + 1) if p is not exclude]
+        if hits:
+            return hits[:NEAR_LIMIT]
+        radius *= 2
+    return []
+
+def _union(bboxes):
+    south, west, north, east = zip(*bboxes)
+    return min(south), min(west), max(north), max(east)
+
+
+# === Resolve a question to places, a point and a map extent ===
+def resolve_geo(query_text):
+    """
+    Local lookup, no network. Returns::
+
+        {"places": [...], "point": [lat, lon] | None, "containing": [...],
+         "related": [...], "center": [lat, lon], "bbox": [[s, w], [n, e]], "found": bool}
+
+    ``places`` are the names in the question. ``related`` are places of the
+    requested kind ("districts", "states", ...) near the point, or inside or
+    near the first named place. ``bbox`` covers all of it, ready for a map
+    ``fit_bounds``.
+    """
+    gazetteer = get_gazetteer()
+    places = gazetteer.match(query_text)
+    kind = requested_kind(query_text, places)
+    point = parse_point(query_text)
+
+    containing, related = [], []
+    if point is not None:
+        containing = [_summary(p) for p in gazetteer.containing(*point, kinds=LANDMARK_KINDS)]
+        kinds = (kind,) if kind else NEARBY_KINDS
+        related = [_summary(p, d) for d, p in _near(gazetteer, *point, kinds)]
+    elif places and kind:
+        anchor = places[0]
+        near = NEAR_RE.search(query_text) is not None
+        if not near and KIND_RANK[kind] > KIND_RANK[anchor["kind"]]:
+            inside = [p for p in gazetteer.within(anchor["bbox"], kinds=(kind,))
+                      if p.get("state", anchor["name"]) == anchor["name"] or anchor["kind"] not in ("state", "union territory")]
+            related = [_summary(p) for p in inside]
+        elif near or kind != anchor["kind"]:
+            related = [_summary(p, d) for d, p in _near(gazetteer, anchor["lat"], anchor["lon"], (kind,), exclude=anchor)]
+
+    boxes = [p["bbox"] for p in places] + [p["bbox"] for p in related]
+    if point is not None:
+        boxes.append((point[0], point[1], point[0], point[1]))
+    found = bool(boxes)
+    south, west, north, east = _union(boxes) if found else INDIA
+    if point is not None:
+        center = list(point)
+    elif places:
+        center = [places[0]["lat"], places[0]["lon"]]
+    else:
+        center = [(south + north) / 2, (west + east) / 2]
+
+    return {
+        "places": [_summary(p) for p in places],
+        "point": list(point) if point is not None else None,
+        "containing": containing,
+        "related": related,
+        "center": center,
+        "bbox": [[south, west], [north, east]],
+        "found": found,
+    }
+
+
+# === Text answer ===
+def _fmt_lat(lat):
+    return f"{abs(lat):.2f}°{'N' if lat >= 0 else 'S'}"
+
+def _fmt_lon(lon):
+    return f"{abs(lon):.2f}°{'E' if lon >= 0 else 'W'}"
+
+def _fmt_point(lat, lon):
+    return f"{_fmt_lat(lat)}, {_fmt_lon(lon)}"
+
+def _fmt_place(item):
+    label = item["kind"] + (f", {item['state']}" if "state" in item else "")
+    text = f"{item['name']} ({label})"
+    if "distance_km" in item:
+        text += f" – {item['distance_km']:.0f} km"
+    return text
+
+def format_geo(geo, query_text):
+    """Chat answer for a resolve_geo result."""
+    if not geo["found"]:
+        return (f"🗺️ I couldn't find a place or coordinates in '{query_text}'. "
+                "Try a state, district or region name, or coordinates like 20N 85E.")
+
+    lines = []
+    for item in geo["places"]:
+        south, west, north, east = item["bbox"]
+        lines.append(f"🗺️ {_fmt_place(item)}: {_fmt_point(item['lat'], item['lon'])} "
+                     f"(extent {_fmt_lat(south)}–{_fmt_lat(north)}, {_fmt_lon(west)}–{_fmt_lon(east)})")
+    if geo["point"] is not None:
+        where = ", ".join(item["name"] for item in geo["containing"]) or "outside the gazetteer's regions"
+        lines.append(f"📍 {_fmt_point(*geo['point'])}: {where}")
+    if geo["related"]:
+        anchor = _fmt_point(*geo["point"]) if geo["point"] is not None else geo["places"][0]["name"]
+        lines.append(f"🔎 Related to {anchor}: " + "; ".join(_fmt_place(item) for item in geo["related"]))
+    return "\n".join(lines)
+
 def query_geo(query_text):
-    # Placeholder for now
-    return f"🗺️ Geospatial query placeholder: You asked '{query_text}'"
+    return format_geo(resolve_geo(query_text), query_text)
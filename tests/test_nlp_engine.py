@@ -0,0 +1,31 @@
+# tests/test_nlp_engine.py
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [os.path.join(ROOT, "backend"), ROOT]
+
+from nlp_engine import _rule_intent
+
+
+@pytest.mark.parametrize("question", [
+    "which districts are near 20N 85E",
+    "Show me districts in Odisha",
+    "List the states in the Himalayas",
+    "Show Kerala on the maps",
+    "What is the rainfall at 20.5° N, 85.25° E",
+    "Which sites are close to Sriharikota",
+])
+def test_geo_questions_route_to_geo(question):
+    assert _rule_intent(question) == "geo"
+
+
+@pytest.mark.parametrize("question", [
+    "Explain the statement of work for INSAT-3D",
+    "Describe the near-real-time rainfall products",
+])
+def test_non_geo_questions_do_not_route_to_geo(question):
+    assert _rule_intent(question) != "geo"
@@ -0,0 +1,98 @@
+# utils/near_dedup.py
+
+import re
+import zlib
+
+import numpy as np
+
+# === MinHash / LSH Parameters ===
+NUM_PERM = 128          # hash functions per signature
+BANDS = 16              # LSH bands of NUM_PERM // BANDS rows; candidate pairs from ~0.7 Jaccard up
+SHINGLE_WORDS = 5       # word n-grams compared between chunks
+THRESHOLD = 0.8         # estimated Jaccard at or above which two chunks are duplicates
+SEED = 1
+
+PRIME = (1 << 32) - 5   # largest 32-bit prime; crc32 shingle hashes are reduced modulo it first
+
+WORD_RE = re.compile(r"\w+")
+
+
+def shingle_hashes(text, k=SHINGLE_WORDS):
+    """crc32 of every lowercased k-word shingle; a chunk shorter than k words is one shingle."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= k:
+        return np.array([zlib.crc32(" ".join(words).encode("utf-8"))], dtype=np.uint64)
+    shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    """``NUM_PERM`` universal hashes h(x) = (a*x + b) mod p, minimised over a chunk's shingles."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=SEED):
+        rng = np.random.default_rng(seed)
+        # a < 2^31 keeps a*x + b inside uint64 for 32-bit x
+        self.a = rng.integers(1, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = shingle_hashes(text) % PRIME
+        return ((self.a * hashes + self.b) % PRIME).min(axis=1).astype(np.uint32)
+
+
+# === Near-duplicate filter ===
+class NearDuplicateFilter:
+    """
+    Streaming near-duplicate detection for chunks. Each signature is cut
+    into ``bands`` bands; chunks sharing any band land in the same bucket
+    and become candidates, which are confirmed by signature agreement
+    (the MinHash estimate of Jaccard similarity). Each chunk costs
+    ``bands`` dict lookups, so a full pass is roughly linear.
+
+    The first chunk of each cluster is its representative.
+    """
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, seed=SEED):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, seed)
+        self.buckets = [{} for _ in range(bands)]   # band -> band bytes -> representative indices
+        self.signatures = []                         # representative index -> signature
+        self.seen = 0
+
+    def add(self, text):
+        """
+        Index ``text``. Returns the index of the representative it duplicates,
+        or None if it starts a new cluster (its own index is then
+        ``len(self.signatures) - 1``).
+        """
+        self.seen += 1
+        sig = self.hasher.signature(text)
+        keys = [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        checked = set()
+        for band, key in zip(self.buckets, keys):
+            for rep in band.get(key, ()):
+                if rep in checked:
+                    continue
+                checked.add(rep)
+                if np.count_nonzero(self.signatures[rep] == sig) >= self.threshold * len(sig):
+                    return rep
+
+        rep = len(self.signatures)
+        self.signatures.append(sig)
+        for band, key in zip(self.buckets, keys):
+            band.setdefault(key, []).append(rep)
+        return None
+
+    @property
+    def kept(self):
+        return len(self.signatures)
+
+    def report(self):
+        """Chunks seen vs kept so far, with the shrink ratio."""
+        shrink = 1 - self.kept / self.seen if self.seen else 0.0
+        return f"{self.seen} -> {self.kept} chunks ({shrink:.1%} smaller, {self.seen - self.kept} near-duplicates)"
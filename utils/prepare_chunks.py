@@ -1,7 +1,16 @@
 # prepare_chunks.py
 
 import os
+import sys
+import csv
+import re
 import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pdfplumber
 from docx import Document
 import pandas as pd
@@ -11,12 +20,20 @@ from tqdm import tqdm
 
 # === Auto-detect project root ===
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "backend"))
+sys.path.append(os.path.join(PROJECT_ROOT, "crawler"))
+
+from chunk_store import ChunkStoreWriter, CHUNK_STORE_DIR
+from page_records import iter_page_records, PAGES_FILE
+from near_dedup import NearDuplicateFilter, THRESHOLD
 
 # === Absolute Paths ===
-ALL_PAGES = os.path.join(PROJECT_ROOT, "crawler", "all_pages.txt")
+ALL_PAGES = os.path.join(PROJECT_ROOT, "crawler", "all_pages.txt")  # pre-JSONL crawls
 DOC_DIR = os.path.join(PROJECT_ROOT, "crawler", "downloads")
+META_FILE = os.path.join(PROJECT_ROOT, "crawler", "file_metadata.csv")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data")
-OUTPUT_JSON = os.path.join(OUTPUT_DIR, "chunks.json")
+OUTPUT_JSONL = os.path.join(OUTPUT_DIR, "chunks.jsonl")
+PARSE_CACHE = os.path.join(OUTPUT_DIR, "parse_cache.sqlite")
 
 # === Ensure output directory exists ===
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -25,99 +42,341 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 MAX_CHUNK_WORDS = 400
 OVERLAP = 50
 
+WORD_RE = re.compile(r"\S+")
+
+def iter_words(pieces):
+    for piece in pieces:
+        for match in WORD_RE.finditer(piece):
+            yield match.group()
+
+def iter_chunks(pieces, max_words=MAX_CHUNK_WORDS, overlap=OVERLAP):
+    """
+    Sliding word window over a stream of text pieces. Yields the same chunks
+    as slicing the full word list at every multiple of ``max_words - overlap``,
+    while holding at most ``max_words`` words.
+    """
+    step = max_words - overlap
+    window = []
+    for word in iter_words(pieces):
+        window.append(word)
+        if len(window) == max_words:
+            chunk = " ".join(window)
+            if len(chunk) > 50:  # Skip tiny chunks
+                yield chunk
+            del window[:step]
+    # Tail windows start at the remaining multiples of step
+    while window:
+        chunk = " ".join(window)
+        if len(chunk) > 50:
+            yield chunk
+        del window[:step]
+
 def chunk_text(text, max_words=MAX_CHUNK_WORDS, overlap=OVERLAP):
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), max_words - overlap):
-        chunk = " ".join(words[i:i+max_words])
-        if len(chunk.strip()) > 50:  # Skip tiny chunks
-            chunks.append(chunk)
-    return chunks
-
-# === Parse all_pages.txt ===
-def parse_all_pages():
-    chunks = []
-    with open(ALL_PAGES, "r", encoding="utf-8") as f:
-        content = f.read()
-        sections = content.split("🌐 URL: ")
-        for sec in sections[1:]:
-            try:
-                url, body = sec.split("\n", 1)
-                page_chunks = chunk_text(body)
-                for ch in page_chunks:
-                    chunks.append({
-                        "chunk": ch,
-                        "source": url.strip(),
-                        "type": "web"
-                    })
-            except Exception as e:
-                print(f"[!] Skipped malformed section: {e}")
-    return chunks
-
-# === Parse PDF ===
-def parse_pdf(path):
-    try:
-        text = ""
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return chunk_text(text)
-    except Exception as e:
-        print(f"[PDF Error] {path}: {e}")
-        return []
+    return iter_chunks([text], max_words, overlap)
 
-# === Parse DOCX ===
-def parse_docx(path):
-    try:
-        doc = Document(path)
-        text = "\n".join([p.text for p in doc.paragraphs])
-        return chunk_text(text)
-    except Exception as e:
-        print(f"[DOCX Error] {path}: {e}")
-        return []
+# === Page records (crawler/pages.jsonl) ===
+def iter_pages(path=PAGES_FILE, follow=False):
+    """
+    Stream the latest record of every page. Re-crawls append a page again
+    only when it changed: a first pass keeps just url -> last line number,
+    the second pass yields those lines. With ``follow`` (crawl still
+    running) the same is done for what the file already holds, then each
+    record appended after that is yielded as it arrives.
+    """
+    latest, end = {}, 0
+    if os.path.exists(path):
+        for i, (end, record) in enumerate(iter_page_records(path, offsets=True)):
+            latest[record["url"]] = i
+        for i, (offset, record) in enumerate(iter_page_records(path, offsets=True)):
+            if offset > end:
+                break   # appended since the first pass; followed below
+            if latest[record["url"]] == i:
+                yield record
+    if not follow:
+        return
+
+    seen = set()
+    for record in iter_page_records(path, follow=True, start=end):
+        key = (record["url"], record["content_hash"])
+        if key not in seen:
+            seen.add(key)
+            yield record
+
+def iter_legacy_pages(path=ALL_PAGES):
+    """Sections of an old all_pages.txt, read line by line."""
+    url, body = None, []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("🌐 URL: "):
+                if url is not None:
+                    yield {"url": url, "text": "".join(body)}
+                url, body = line[len("🌐 URL: "):].strip(), []
+            elif url is not None:
+                body.append(line)
+    if url is not None:
+        yield {"url": url, "text": "".join(body)}
+
+def parse_all_pages(follow=False):
+    if follow or os.path.exists(PAGES_FILE):
+        pages = iter_pages(PAGES_FILE, follow=follow)
+    elif os.path.exists(ALL_PAGES):
+        pages = iter_legacy_pages(ALL_PAGES)
+    else:
+        print(f"[!] No crawled pages found at {PAGES_FILE}")
+        return
+    for page in pages:
+        for window, ch in enumerate(chunk_text(page["text"])):
+            yield {
+                "chunk": ch,
+                "source": page["url"],
+                "type": "web",
+                "window": window
+            }
+
+# === Document text extraction (runs in worker processes) ===
+# Bump when extraction output changes; cached text from older versions is ignored
+PARSER_VERSION = "2"
+
+def pdf_pages(path):
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            page.close()   # drop the page's parsed layout before the next one
+
+# Extractors return a document's text as a list of pieces (pages, paragraphs,
+# sheets). iter_chunks reads them in order, so they are never joined into one string.
+def pdf_pieces(path):
+    return list(pdf_pages(path))
+
+def docx_pieces(path):
+    doc = Document(path)
+    return [p.text for p in doc.paragraphs]
+
+def xlsx_pieces(path):
+    dfs = pd.read_excel(path, sheet_name=None)
+    return [df.to_string(index=False) for df in dfs.values()]
+
+EXTRACTORS = {".pdf": pdf_pieces, ".docx": docx_pieces, ".xlsx": xlsx_pieces}
+ERROR_LABELS = {".pdf": "PDF", ".docx": "DOCX", ".xlsx": "XLSX"}
+
+def parser_version(ext):
+    library = {".pdf": pdfplumber, ".xlsx": pd}.get(ext)
+    return f"{PARSER_VERSION}{ext}-{getattr(library, '__version__', '')}"
 
-# === Parse XLSX ===
-def parse_xlsx(path):
+def parse_file(path):
+    """Worker entry point: (text pieces or None, seconds, error)."""
+    ext = Path(path).suffix.lower()
+    started = time.perf_counter()
     try:
-        dfs = pd.read_excel(path, sheet_name=None)
-        text = "\n".join([df.to_string(index=False) for df in dfs.values()])
-        return chunk_text(text)
+        return EXTRACTORS[ext](path), time.perf_counter() - started, None
     except Exception as e:
-        print(f"[XLSX Error] {path}: {e}")
-        return []
+        return None, time.perf_counter() - started, str(e)
+
+# === Parse cache: extracted text keyed by file content hash + parser version ===
+SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+def file_hash(path):
+    stem = Path(path).stem
+    if SHA256_RE.fullmatch(stem):
+        return stem   # downloads are already stored under their sha256
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class ParseCache:
+    def __init__(self, path=PARSE_CACHE):
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parsed ("
+                " hash TEXT NOT NULL, parser_version TEXT NOT NULL, text TEXT NOT NULL,"
+                " seconds REAL NOT NULL, parsed_at REAL NOT NULL,"
+                " PRIMARY KEY (hash, parser_version))"
+            )
+
+    def has(self, digest, version):
+        return self._conn.execute(
+            "SELECT 1 FROM parsed WHERE hash = ? AND parser_version = ?", (digest, version)
+        ).fetchone() is not None
+
+    def get(self, digest, version):
+        row = self._conn.execute(
+            "SELECT text FROM parsed WHERE hash = ? AND parser_version = ?", (digest, version)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, digest, version, text, seconds):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?, ?)", (digest, version, text, seconds, time.time())
+            )
+
+    def close(self):
+        self._conn.close()
+
+# === Source URLs of downloaded files (stored under content-hash names) ===
+def load_file_sources():
+    sources = {}
+    if os.path.exists(META_FILE):
+        with open(META_FILE, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                sources.setdefault(row["filename"], row["source_url"])
+    return sources
 
 # === Parse all documents in crawler/downloads ===
-def parse_documents():
-    chunks = []
-    for file in tqdm(os.listdir(DOC_DIR), desc="📄 Parsing documents"):
+def parse_documents(workers=None, use_cache=True, slowest=5, in_flight=None):
+    """
+    Yield document chunks in directory order. Cache hits are read from the
+    parse cache one at a time; only new or changed files go to the process
+    pool, at most ``in_flight`` of them (default twice the workers) parsed
+    ahead of the chunk being written, so memory holds a handful of
+    documents whatever the corpus size.
+    """
+    sources = load_file_sources()
+    files = sorted(f for f in os.listdir(DOC_DIR) if Path(f).suffix.lower() in EXTRACTORS)
+    cache = ParseCache() if use_cache else None
+
+    jobs = []   # (file, digest, version, cached)
+    for file in files:
         path = os.path.join(DOC_DIR, file)
         ext = Path(file).suffix.lower()
-        chunk_list = []
+        digest, version = file_hash(path), parser_version(ext)
+        jobs.append((file, digest, version, cache is not None and cache.has(digest, version)))
+    misses = [os.path.join(DOC_DIR, file) for file, _, _, cached in jobs if not cached]
+    print(f"📄 {len(files)} documents: {len(files) - len(misses)} cached, {len(misses)} to parse")
+    misses = iter(misses)
 
-        if ext == ".pdf":
-            chunk_list = parse_pdf(path)
-        elif ext == ".docx":
-            chunk_list = parse_docx(path)
-        elif ext == ".xlsx":
-            chunk_list = parse_xlsx(path)
+    in_flight = in_flight or 2 * (workers or os.cpu_count() or 1)
+    timings = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()   # futures in submission order, which is job order
 
-        for ch in chunk_list:
-            chunks.append({
-                "chunk": ch,
-                "source": file,
-                "type": ext.replace(".", "")
-            })
-    return chunks
+        def top_up():
+            while len(pending) < in_flight:
+                path = next(misses, None)
+                if path is None:
+                    return
+                pending.append(pool.submit(parse_file, path))
+
+        top_up()
+        for file, digest, version, cached in tqdm(jobs, desc="📄 Parsing documents"):
+            ext = Path(file).suffix.lower()
+            if cached:
+                pieces = [cache.get(digest, version)]
+            else:
+                pieces, seconds, error = pending.popleft().result()
+                top_up()
+                timings.append((seconds, file))
+                if error is not None:
+                    tqdm.write(f"[{ERROR_LABELS[ext]} Error] {os.path.join(DOC_DIR, file)}: {error}")
+                    continue
+                tqdm.write(f"  ⏱️ {file}: {seconds:.2f}s, {sum(len(p) for p in pieces)} chars")
+                if cache is not None:
+                    # Same text chunk_text would see: piece breaks separate words
+                    cache.set(digest, version, "\n".join(pieces), seconds)
+
+            for window, ch in enumerate(iter_chunks(pieces)):
+                yield {
+                    "chunk": ch,
+                    "source": sources.get(file, file),
+                    "type": ext.replace(".", ""),
+                    "window": window
+                }
+
+    if cache is not None:
+        cache.close()
+    if timings:
+        total = sum(seconds for seconds, _ in timings)
+        print(f"⏱️ Parsed {len(timings)} documents in {total:.1f}s of worker time; slowest:")
+        for seconds, file in sorted(timings, reverse=True)[:slowest]:
+            print(f"   {seconds:8.2f}s  {sources.get(file, file)}")
+
+# === Streaming output: chunks.jsonl and the binary chunk store, one chunk at a time ===
+def chunk_id(source, text):
+    """Stable across runs: derived from where the chunk came from and what it says."""
+    return hashlib.sha1(f"{source}\x00{text}".encode("utf-8")).hexdigest()[:16]
+
+def write_chunks(chunks, jsonl_path=OUTPUT_JSONL, store_dir=CHUNK_STORE_DIR, dedup=None):
+    """
+    Write each chunk as one compact JSON line as soon as it is produced.
+    Ids are unique within a source's run of chunks; only that run's ids
+    are remembered.
+
+    With a NearDuplicateFilter, a chunk that near-duplicates an earlier one
+    is dropped and its source is added to that chunk's ``sources`` (in the
+    chunk store, and in chunks.jsonl by a second streaming pass).
+
+    ``prev`` names the chunk holding the previous window of the same
+    document. It is left out when that window was dropped, so readers
+    never mistake a gap for overlapping neighbours.
+    """
+    count = 0
+    current_source, seen = None, set()
+    prev_id = None       # id of the last written chunk if it is the previous window in the stream
+    extra_sources = {}   # line number of a kept chunk -> sources of its dropped duplicates
+    tmp = jsonl_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f, ChunkStoreWriter(store_dir) as store:
+        for chunk in chunks:
+            window = chunk.pop("window", 0)
+            if dedup is not None:
+                rep = dedup.add(chunk["chunk"])
+                if rep is not None:
+                    extra_sources.setdefault(rep, []).append(chunk["source"])
+                    store.add_source(rep, chunk["source"])
+                    prev_id = None
+                    continue
+            if chunk["source"] != current_source:
+                current_source, seen = chunk["source"], set()   # a source's chunks are contiguous
+            cid = chunk_id(chunk["source"], chunk["chunk"])
+            n = 1
+            while cid in seen:   # identical text repeated within one source
+                n += 1
+                cid = f"{chunk_id(chunk['source'], chunk['chunk'])}-{n}"
+            seen.add(cid)
+            prev = prev_id if window > 0 else None
+            record = {"id": cid, **chunk, "prev": prev}
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            store.add(chunk["chunk"], chunk["source"], chunk["type"], prev=count - 1 if prev is not None else -1)
+            prev_id = cid
+            count += 1
+
+    if dedup is None:
+        os.replace(tmp, jsonl_path)
+        return count
+    with open(tmp, "r", encoding="utf-8") as src, open(jsonl_path, "w", encoding="utf-8") as f:
+        for i, line in enumerate(src):
+            record = json.loads(line)
+            record["sources"] = list(dict.fromkeys([record["source"], *extra_sources.get(i, ())]))
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.remove(tmp)
+    return count
 
 # === MAIN ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk crawled pages and documents.")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep reading pages.jsonl while a crawl is still writing it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="document parser processes")
+    parser.add_argument("--in-flight", type=int, default=None,
+                        help="documents parsed ahead of chunking (default: twice --workers)")
+    parser.add_argument("--no-cache", action="store_true", help="re-parse every document")
+    parser.add_argument("--dedup-threshold", type=float, default=THRESHOLD,
+                        help="estimated Jaccard similarity at which chunks count as near-duplicates")
+    parser.add_argument("--no-dedup", action="store_true", help="keep near-duplicate chunks")
+    args = parser.parse_args()
+
     print("🚀 Preparing chunks from all data sources...")
 
-    all_chunks = []
-    all_chunks += parse_all_pages()
-    all_chunks += parse_documents()
+    def all_chunks():
+        yield from parse_all_pages(follow=args.follow)
+        yield from parse_documents(workers=args.workers, use_cache=not args.no_cache, in_flight=args.in_flight)
 
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(all_chunks, f, indent=2, ensure_ascii=False)
+    dedup = None if args.no_dedup else NearDuplicateFilter(threshold=args.dedup_threshold)
+    total = write_chunks(all_chunks(), dedup=dedup)
+    if dedup is not None:
+        print(f"🧹 Near-duplicate pass: {dedup.report()}")
 
-    print(f"✅ Done. {len(all_chunks)} chunks saved to {OUTPUT_JSON}")
+    print(f"✅ Done. {total} chunks saved to {OUTPUT_JSONL}")
+    print(f"📦 Binary chunk store written to {CHUNK_STORE_DIR}")